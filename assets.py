@@ -0,0 +1,147 @@
+import hashlib
+import io
+import os
+import struct
+
+import pygame
+
+from settings import (
+    ASSET_DIR,
+    SHIP_SIZE, UFO_SIZE, BULLET_SIZE, METEOR_SIZE, PLANET_SIZES,
+    EXPLOSION_SIZE, SMALL_EXPL_SIZE,
+)
+
+# ---------------------------------------------------------
+# ASSET MANAGER
+# ---------------------------------------------------------
+# Every file is read once. Scaled sprites are kept in memory and
+# in an on-disk cache of raw RGBA pixels, so later starts skip both
+# the PNG decode and the rescale. A cache entry is keyed on the
+# cache version, the source file's size and mtime, and the target
+# size, so editing a PNG or changing a scale rebuilds it.
+
+CACHE_VERSION = 1
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "sprites")
+FONT_FILE = os.path.join("fonts", "PressStart2P.ttf")
+
+_HEADER = struct.Struct("<8s20sII")
+_MAGIC = b"SPRITE01"
+
+# name -> (file, scaled size)
+SPRITES = {
+    "ship": ("ship.png", SHIP_SIZE),
+    "ufo": ("ufo.png", UFO_SIZE),
+    "bullet": ("bullet.png", BULLET_SIZE),
+    "meteor": ("meteor.png", METEOR_SIZE),
+    "explosion": ("explosion.png", EXPLOSION_SIZE),
+    "small_explosion": ("small_explosion.png", SMALL_EXPL_SIZE),
+}
+for _k, _size in enumerate(PLANET_SIZES):
+    SPRITES[f"planet{_k + 1}"] = (f"planet{_k + 1}.png", _size)
+
+
+def _int_size(size):
+    return None if size is None else (int(size[0]), int(size[1]))
+
+
+class Assets:
+    def __init__(self, asset_dir=ASSET_DIR, cache_dir=CACHE_DIR):
+        self.asset_dir = asset_dir
+        self.cache_dir = cache_dir
+        self._raw = {}        # (file, size) -> unconverted surface
+        self._converted = {}  # (file, size, alpha) -> display-format surface
+        self._fonts = {}      # size -> Font
+        self._font_data = None
+
+    # -----------------------------------------------------
+    # Raw surfaces (no display needed, used by the headless core)
+    # -----------------------------------------------------
+    def surface(self, file, size=None):
+        """`file` loaded and scaled to `size`, without converting"""
+        size = _int_size(size)
+        key = (file, size)
+        surf = self._raw.get(key)
+        if surf is None:
+            surf = self._load_cached(file, size)
+            self._raw[key] = surf
+        return surf
+
+    def _cache_key(self, path, size):
+        st = os.stat(path)
+        ident = f"{CACHE_VERSION}|{st.st_size}|{st.st_mtime_ns}|{size}"
+        return hashlib.sha1(ident.encode()).digest()
+
+    def _cache_path(self, file, size):
+        tag = "orig" if size is None else f"{size[0]}x{size[1]}"
+        return os.path.join(self.cache_dir, f"{os.path.splitext(file)[0]}-{tag}.bin")
+
+    def _load_cached(self, file, size):
+        path = os.path.join(self.asset_dir, file)
+        key = self._cache_key(path, size)
+        cache_path = self._cache_path(file, size)
+
+        try:
+            with open(cache_path, "rb") as f:
+                magic, stored, w, h = _HEADER.unpack(f.read(_HEADER.size))
+                if magic == _MAGIC and stored == key:
+                    return pygame.image.frombytes(f.read(), (w, h), "RGBA")
+        except (OSError, struct.error, ValueError):
+            pass
+
+        surf = pygame.image.load(path)
+        if size is not None:
+            surf = pygame.transform.scale(surf, size)
+        data = pygame.image.tobytes(surf, "RGBA")
+        w, h = surf.get_size()
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = cache_path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, key, w, h))
+                f.write(data)
+            os.replace(tmp, cache_path)
+        except OSError:
+            # A read-only install just runs without the disk cache
+            pass
+
+        # Same pixel format whether or not the cache was hit
+        return pygame.image.frombytes(data, (w, h), "RGBA")
+
+    # -----------------------------------------------------
+    # Display-format surfaces (after the window exists)
+    # -----------------------------------------------------
+    def image(self, file, size=None, alpha=True):
+        size = _int_size(size)
+        key = (file, size, alpha)
+        surf = self._converted.get(key)
+        if surf is None:
+            raw = self.surface(file, size)
+            surf = raw.convert_alpha() if alpha else raw.convert()
+            self._converted[key] = surf
+        return surf
+
+    def sprite(self, name):
+        file, size = SPRITES[name]
+        return self.image(file, size)
+
+    def sprite_surface(self, name):
+        """Unconverted scaled sprite, e.g. for building masks"""
+        file, size = SPRITES[name]
+        return self.surface(file, size)
+
+    # -----------------------------------------------------
+    # Fonts (the TTF is read once, one Font per size)
+    # -----------------------------------------------------
+    def font(self, size):
+        font = self._fonts.get(size)
+        if font is None:
+            if self._font_data is None:
+                with open(os.path.join(self.asset_dir, FONT_FILE), "rb") as f:
+                    self._font_data = f.read()
+            font = pygame.font.Font(io.BytesIO(self._font_data), size)
+            self._fonts[size] = font
+        return font
+
+
+ASSETS = Assets()
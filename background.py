@@ -0,0 +1,88 @@
+import pygame
+
+# ---------------------------------------------------------
+# INCREMENTAL SCROLLING BACKGROUND
+# ---------------------------------------------------------
+# The background image, already scaled to the window width, is
+# tiled once into a strip one tile taller than the window, so any
+# window-sized view of the endless background is a single
+# contiguous area of the strip. Each frame the window still holds
+# the last frame: it is shifted in place with Surface.scroll, the
+# newly exposed rows are copied from the strip, and only the rects
+# sprites and labels covered last frame are repainted. Once the
+# stale rects add up to more than `full_ratio` of the window (a
+# crowded frame), one full repaint from the strip is cheaper than
+# many small ones. A full repaint also follows invalidate(), when
+# something else drew over the window.
+
+
+class ScrollingBackground:
+    def __init__(self, image, view_size, full_ratio=0.5):
+        self.view_w, self.view_h = view_size
+        self.tile_h = image.get_height()
+        self.full_area = full_ratio * self.view_w * self.view_h
+
+        rows = self.tile_h + self.view_h
+        self.strip = pygame.Surface((self.view_w, rows), 0, image)
+        for y in range(0, rows, self.tile_h):
+            self.strip.blit(image, (0, y))
+
+        self.offset = None
+        self._dest = pygame.Rect(0, 0, 0, 0)
+        self._src = pygame.Rect(0, 0, 0, 0)
+
+    def invalidate(self):
+        """The target no longer shows the last frame; repaint it all next time"""
+        self.offset = None
+
+    def wrap(self, offset):
+        """Scroll position in pixels, reduced to one tile"""
+        return int(offset) % self.tile_h
+
+    def _area(self, rect, offset):
+        # Strip area that shows at `rect` of the view when scrolled by `offset`
+        return pygame.Rect(rect.x, (rect.y - offset) % self.tile_h, rect.w, rect.h)
+
+    def paint(self, surface, rect, offset):
+        """Copy the background under `rect` of the view"""
+        surface.blit(self.strip, rect, self._area(rect, offset))
+
+    def draw(self, surface, offset, stale=()):
+        """Bring `surface` to the background scrolled by `offset`.
+
+        `stale` lists the rects drawn over the background last frame.
+        Returns True when the view moved, i.e. every pixel changed.
+        """
+        offset = self.wrap(offset)
+        view = surface.get_rect()
+
+        if self.offset is None:
+            self.offset = offset
+            self.paint(surface, view, offset)
+            return True
+
+        delta = (offset - self.offset) % self.tile_h
+        if delta > self.tile_h // 2:
+            delta -= self.tile_h
+        self.offset = offset
+
+        if sum(r.w * r.h for r in stale) > self.full_area:
+            self.paint(surface, view, offset)
+            return bool(delta)
+
+        if delta:
+            surface.scroll(0, delta)
+            if delta > 0:
+                exposed = pygame.Rect(0, 0, self.view_w, delta)
+            else:
+                exposed = pygame.Rect(0, self.view_h + delta, self.view_w, -delta)
+            self.paint(surface, exposed, offset)
+
+        # Last frame's sprites travelled with the scroll. The blit
+        # clips to the view; scratch rects keep this allocation-free.
+        dest, area = self._dest, self._src
+        for rect in stale:
+            dest.update(rect.x, rect.y + delta, rect.w, rect.h)
+            area.update(dest.x, (dest.y - offset) % self.tile_h, dest.w, dest.h)
+            surface.blit(self.strip, dest, area)
+        return bool(delta)
@@ -0,0 +1,496 @@
+"""Benchmarks for the game loop.
+
+Run one benchmark by name, e.g.
+
+    python bench.py masks --entities 400
+    python bench.py draw --entities 300
+
+`frame` runs whole game frames (game.step + main.draw_window) in
+fixed scenarios and reports simulation and rendering percentiles.
+Save a baseline once and compare later runs against it:
+
+    python bench.py frame --save-baseline bench_baseline.json
+    python bench.py frame --baseline bench_baseline.json
+
+`alloc` traces allocations over the same scenarios to check that
+steady-state frames allocate next to nothing; it exits 1 when a
+scenario keeps more than its budget (tests/test_alloc.py runs it).
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from collision import (
+    hit_pairs, first_hits, overlap_any,
+    load_masks, mask_test, mask_hit_any,
+)
+from settings import WIDTH, HEIGHT, FPS, SHIP_SIZE, UFO_SIZE, METEOR_SIZE
+
+BUDGET_MS = 1000 / FPS
+
+
+# ---------------------------------------------------------
+# MASK NARROW PHASE vs RECT ONLY
+# ---------------------------------------------------------
+def bench_masks(entities=300, frames=300, seed=0):
+    """Collision cost per frame with many UFOs, meteors and bullets on screen"""
+    rng = np.random.default_rng(seed)
+    masks = load_masks()
+
+    ux, uy = rng.uniform(0, WIDTH, entities), rng.uniform(-100, HEIGHT, entities)
+    mx, my = rng.uniform(0, WIDTH, entities), rng.uniform(-100, HEIGHT, entities)
+    bx, by = rng.uniform(0, WIDTH, entities), rng.uniform(-100, HEIGHT, entities)
+    px, py = WIDTH // 2, HEIGHT - 150
+    bw, bh = masks["bullet"].get_size()
+
+    def rect_only():
+        first_hits(*hit_pairs(ux, uy, UFO_SIZE[0], UFO_SIZE[1], bx, by, bw, bh))
+        first_hits(*hit_pairs(mx, my, METEOR_SIZE[0], METEOR_SIZE[1], bx, by, bw, bh))
+        overlap_any(px, py, SHIP_SIZE[0], SHIP_SIZE[1], mx, my, METEOR_SIZE[0], METEOR_SIZE[1])
+        overlap_any(px, py, SHIP_SIZE[0], SHIP_SIZE[1], ux, uy, UFO_SIZE[0], UFO_SIZE[1])
+
+    def with_masks():
+        i, j = hit_pairs(ux, uy, UFO_SIZE[0], UFO_SIZE[1], bx, by, bw, bh)
+        first_hits(i, j, mask_test(i, j, ux, uy, masks["ufo"], bx, by, masks["bullet"]))
+        i, j = hit_pairs(mx, my, METEOR_SIZE[0], METEOR_SIZE[1], bx, by, bw, bh)
+        first_hits(i, j, mask_test(i, j, mx, my, masks["meteor"], bx, by, masks["bullet"]))
+        mask_hit_any(px, py, masks["ship"], mx, my, METEOR_SIZE[0], METEOR_SIZE[1], masks["meteor"])
+        mask_hit_any(px, py, masks["ship"], ux, uy, UFO_SIZE[0], UFO_SIZE[1], masks["ufo"])
+
+    results = {}
+    for name, fn in (("rect", rect_only), ("rect+mask", with_masks)):
+        times = []
+        for _ in range(frames):
+            # Drift everything a little so the hit set changes per frame
+            uy[:] = (uy + 2) % HEIGHT
+            my[:] = (my + 3.2) % HEIGHT
+            by[:] = (by - 12) % HEIGHT
+            t0 = time.perf_counter()
+            fn()
+            times.append((time.perf_counter() - t0) * 1000)
+        results[name] = times
+
+    print(f"{entities} UFOs, {entities} meteors, {entities} bullets, {frames} frames")
+    for name, times in results.items():
+        mean = sum(times) / len(times)
+        print(f"  {name:<10} mean {mean:6.3f} ms  max {max(times):6.3f} ms"
+              f"  ({100 * mean / BUDGET_MS:4.1f}% of {BUDGET_MS:.1f} ms budget)")
+    return results
+
+
+# ---------------------------------------------------------
+# SPRITE DRAWING: one blit per entity vs atlas + blits()
+# ---------------------------------------------------------
+def bench_draw(entities=300, frames=300, seed=0):
+    """Per-entity draw overhead with hundreds of sprites on screen"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from assets import ASSETS
+    from atlas import SpriteAtlas, SpriteBatch
+
+    pygame.init()
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    names = ("ufo", "bullet", "meteor", "small_explosion")
+    sprites = {name: ASSETS.sprite(name) for name in names}
+    batch = SpriteBatch(SpriteAtlas(sprites))
+
+    rng = np.random.default_rng(seed)
+    layers = [
+        (name, rng.uniform(0, WIDTH, entities).tolist(), rng.uniform(0, HEIGHT, entities).tolist())
+        for name in names
+    ]
+
+    def per_entity():
+        for name, xs, ys in layers:
+            spr = sprites[name]
+            for pos in zip(xs, ys):
+                win.blit(spr, pos)
+
+    def batched():
+        for name, xs, ys in layers:
+            batch.add_many(name, xs, ys)
+        batch.submit(win)
+
+    print(f"{entities} sprites x {len(names)} layers, {frames} frames")
+    results = {}
+    for label, fn in (("blit", per_entity), ("atlas+blits", batched)):
+        times = []
+        for _ in range(frames):
+            t0 = time.perf_counter()
+            fn()
+            times.append((time.perf_counter() - t0) * 1000)
+        results[label] = times
+        mean = sum(times) / len(times)
+        per_sprite = 1000 * mean / (entities * len(names))
+        print(f"  {label:<12} mean {mean:6.3f} ms  ({per_sprite:5.2f} us/sprite)")
+
+    pygame.quit()
+    return results
+
+
+# ---------------------------------------------------------
+# WHOLE FRAMES: SIMULATION + RENDERING PER SCENARIO
+# ---------------------------------------------------------
+PERCENTILES = (50, 95, 99)
+WARMUP_FRAMES = 30
+REFILL_FRAMES = 5
+
+
+def _top_up(pool, count, make):
+    while pool.n < count:
+        pool.spawn(*make())
+
+
+def _stress_setup(entities, seed):
+    """Keep `entities` bullets, UFOs and meteors on screen every frame"""
+    rng = random.Random(seed)
+
+    def bullet():
+        return rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT), 0.0, -12.0
+
+    def ufo():
+        return rng.uniform(40, WIDTH - 140), rng.uniform(-80, HEIGHT), 0.0, 2.0
+
+    def meteor():
+        return rng.uniform(0, WIDTH + 50), rng.uniform(-120, HEIGHT), -2.7, 3.2
+
+    def before_step(state):
+        # Invincible, so the run never pauses or ends mid-benchmark
+        state.invincible = True
+        state.inv_timer = state.now
+        _top_up(state.bullets, entities, bullet)
+        _top_up(state.enemies, entities, ufo)
+        _top_up(state.meteors, entities, meteor)
+
+    return before_step
+
+
+def _load_waves(path):
+    """(path, parsed waves, digest) of the wave file the scenarios play"""
+    from spawner import WAVES_FILE, load_waves, waves_digest
+
+    path = path or WAVES_FILE
+    waves = load_waves(path)
+    return path, waves, waves_digest(waves)
+
+
+def _scenarios(entities, seed, waves, recording=None):
+    """name -> (GameState factory, inputs(state, frame), before_step or None)"""
+    from bots import hunter
+    from game import GameState, NO_INPUT
+
+    bot = hunter(seed)
+
+    if recording is not None:
+        replay_inputs = list(recording.inputs())
+
+        def typical_inputs(state, frame):
+            return replay_inputs[frame % len(replay_inputs)]
+
+        typical_seed = recording.seed
+    else:
+        def typical_inputs(state, frame):
+            return bot(state)
+
+        typical_seed = seed
+
+    return {
+        "idle": (lambda: GameState(seed, waves), lambda state, frame: NO_INPUT, None),
+        "typical": (lambda: GameState(typical_seed, waves), typical_inputs, None),
+        "stress": (lambda: GameState(seed, waves), lambda state, frame: bot(state),
+                   _stress_setup(entities, seed)),
+    }
+
+
+def _summary(times):
+    times = np.asarray(times)
+    stats = {f"p{p}": float(np.percentile(times, p)) for p in PERCENTILES}
+    stats["mean"] = float(times.mean())
+    return stats
+
+
+def _run_scenario(main, new_state, inputs, before_step, frames):
+    from game import step
+
+    sim, render = [], []
+    state = new_state()
+    main.dirty.reset()
+    for frame in range(WARMUP_FRAMES + frames):
+        if state.game_over:
+            # Idle and typical runs die eventually; keep measuring a fresh run
+            state = new_state()
+            main.dirty.reset()
+        if before_step is not None:
+            before_step(state)
+        keys = inputs(state, frame)
+
+        t0 = time.perf_counter()
+        was_paused = state.paused
+        step(state, keys)
+        t1 = time.perf_counter()
+        if was_paused:
+            if state.paused:
+                main.draw_pause(state)
+        else:
+            main.draw_window(state)
+        t2 = time.perf_counter()
+
+        if frame >= WARMUP_FRAMES:
+            sim.append((t1 - t0) * 1000)
+            render.append((t2 - t1) * 1000)
+    return {"sim": _summary(sim), "render": _summary(render)}
+
+
+def _compare(results, baseline, tolerance):
+    """Print p95 changes against `baseline`; return the regressed keys"""
+    regressions = []
+    print(f"against baseline ({tolerance:.0%} tolerance on p95):")
+    for name, phases in results.items():
+        for phase, stats in phases.items():
+            old = baseline.get("scenarios", {}).get(name, {}).get(phase)
+            if old is None:
+                print(f"  {name:<8} {phase:<6} no baseline")
+                continue
+            change = stats["p95"] / old["p95"] - 1 if old["p95"] else 0.0
+            flag = ""
+            if change > tolerance:
+                flag = "  REGRESSION"
+                regressions.append(f"{name}.{phase}")
+            print(f"  {name:<8} {phase:<6} p95 {old['p95']:6.3f} -> {stats['p95']:6.3f} ms"
+                  f" ({change:+.0%}){flag}")
+    return regressions
+
+
+def bench_frame(entities=300, frames=600, seed=0, scenarios=None, replay=None,
+                baseline=None, save_baseline=None, tolerance=0.25, waves=None):
+    """Per-frame simulation and render cost in the idle, typical and stress scenarios"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    import main as game_main
+
+    waves_file, waves, digest = _load_waves(waves)
+    recording = None
+    if replay is not None:
+        from replay import Recording, ReplayError, check
+        recording = Recording.load(replay)
+        try:
+            check(recording, waves)
+        except ReplayError as exc:
+            print(f"{replay}: {exc}")
+            return 1
+
+    game_main.init_display()
+    game_main.load_gameplay_assets()
+
+    table = _scenarios(entities, seed, waves, recording)
+    names = scenarios or list(table)
+    results = {}
+    print(f"{frames} frames per scenario, stress with {entities} bullets/UFOs/meteors")
+    print(f"waves: {waves_file} ({digest:016x})")
+    for name in names:
+        results[name] = _run_scenario(game_main, *table[name], frames)
+        for phase, stats in results[name].items():
+            pcts = "  ".join(f"p{p} {stats[f'p{p}']:6.3f}" for p in PERCENTILES)
+            print(f"  {name:<8} {phase:<6} {pcts} ms  ({100 * stats['p95'] / BUDGET_MS:4.1f}% of budget at p95)")
+    pygame.quit()
+
+    report = {
+        "frames": frames,
+        "entities": entities,
+        "seed": seed,
+        "waves": {"file": waves_file, "digest": f"{digest:016x}"},
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "machine": platform.platform(),
+        "scenarios": results,
+    }
+    if save_baseline:
+        with open(save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline written to {save_baseline}")
+
+    status = 0
+    if baseline:
+        with open(baseline) as f:
+            old = json.load(f)
+        old_waves = old.get("waves", {}).get("digest")
+        if old_waves != report["waves"]["digest"]:
+            print(f"note: baseline ran on waves {old_waves or 'unknown'}, not {digest:016x}")
+        regressions = _compare(results, old, tolerance)
+        if regressions:
+            print("regressed: " + ", ".join(regressions))
+            status = 1
+    return status
+
+
+# ---------------------------------------------------------
+# ALLOCATIONS PER FRAME (tracemalloc + GC collections)
+# ---------------------------------------------------------
+# Scenarios whose frames should allocate next to nothing. Stress
+# spawns hundreds of entities a frame on purpose, so only its
+# retained memory is held to a budget.
+STEADY_SCENARIOS = ("idle", "typical")
+
+
+def bench_alloc(entities=300, frames=600, seed=0, max_retained_kb=48, max_blocks=200,
+                max_peak_kb=16, max_gc_runs=0, waves=None):
+    """Memory a steady-state frame allocates and keeps, and GC runs it triggers.
+
+    Returns 1 when a scenario keeps more than `max_retained_kb` or
+    `max_blocks` over the run, or a STEADY_SCENARIOS frame peaks above
+    `max_peak_kb` or they trigger more than `max_gc_runs` collections;
+    otherwise 0.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    import main as game_main
+    from game import step, snapshot
+
+    waves_file, waves, digest = _load_waves(waves)
+    game_main.init_display()
+    game_main.load_gameplay_assets()
+
+    collections = [0]
+
+    def on_gc(phase, info):
+        if phase == "start":
+            collections[0] += 1
+
+    print(f"{frames} frames per scenario after {WARMUP_FRAMES} warm-up frames")
+    print(f"waves: {waves_file} ({digest:016x})")
+    print(f"  {'':<8} {'peak/frame':>12} {'max':>10} {'retained':>10} {'blocks':>7} {'GC runs':>8}")
+    results = {}
+    for name, (new_state, inputs, before_step) in _scenarios(entities, seed, waves).items():
+        state = new_state()
+        game_main.dirty.reset()
+
+        def frame(k):
+            nonlocal state
+            if state.game_over:
+                state = new_state()
+            if before_step is not None:
+                before_step(state)
+            keys = inputs(state, k)
+            snapshot(state)
+            step(state, keys)
+            if state.paused:
+                game_main.draw_pause(state)
+            else:
+                game_main.draw_window(state, 0.5)
+
+        for k in range(WARMUP_FRAMES):
+            frame(k)
+
+        # Preallocated, so the bookkeeping does not show up as retained
+        peaks = np.zeros(frames)
+
+        # Retained memory is taken between two full collections, which
+        # also empty the interpreter's free lists (tuples, floats), so
+        # those caches do not count. A few frames refill them before
+        # GC runs are counted.
+        tracemalloc.start()
+        gc.collect()
+        start_size = tracemalloc.get_traced_memory()[0]
+        start_blocks = sys.getallocatedblocks()
+        for k in range(REFILL_FRAMES):
+            frame(k)
+        collections[0] = 0
+        gc.callbacks.append(on_gc)
+        for k in range(frames):
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            frame(k)
+            peaks[k] = tracemalloc.get_traced_memory()[1] - base
+        gc.callbacks.remove(on_gc)
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - start_size
+        blocks = sys.getallocatedblocks() - start_blocks
+        tracemalloc.stop()
+
+        results[name] = {
+            "peak_bytes_p50": float(np.median(peaks)),
+            "peak_bytes_max": float(peaks.max()),
+            "retained_bytes": retained,
+            "retained_blocks": blocks,
+            "gc_runs": collections[0],
+        }
+        print(f"  {name:<8} {np.median(peaks) / 1024:9.1f} KB {peaks.max() / 1024:7.1f} KB"
+              f" {retained / 1024:7.1f} KB {blocks:7d} {collections[0]:8d}")
+
+    pygame.quit()
+
+    status = 0
+    over = [name for name, r in results.items()
+            if r["retained_bytes"] > max_retained_kb * 1024 or r["retained_blocks"] > max_blocks]
+    if over:
+        print(f"over retained budget ({max_retained_kb:g} KB, {max_blocks} blocks): " + ", ".join(over))
+        status = 1
+    churn = [name for name in STEADY_SCENARIOS
+             if results[name]["peak_bytes_max"] > max_peak_kb * 1024
+             or results[name]["gc_runs"] > max_gc_runs]
+    if churn:
+        print(f"over per-frame budget ({max_peak_kb:g} KB peak, {max_gc_runs} GC runs): "
+              + ", ".join(churn))
+        status = 1
+    return status
+
+
+BENCHES = {
+    "masks": bench_masks,
+    "draw": bench_draw,
+    "frame": bench_frame,
+    "alloc": bench_alloc,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Space Attack benchmarks")
+    parser.add_argument("bench", choices=sorted(BENCHES))
+    parser.add_argument("--entities", type=int, default=300)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--waves", help="wave timeline for frame/alloc (default: data/waves.json)")
+
+    frame = parser.add_argument_group("frame benchmark")
+    frame.add_argument("--scenario", action="append", choices=("idle", "typical", "stress"),
+                       help="run only these scenarios (repeatable)")
+    frame.add_argument("--replay", help="drive the typical scenario from a recorded session")
+    frame.add_argument("--baseline", help="compare against this baseline JSON; exit 1 on regression")
+    frame.add_argument("--save-baseline", help="write results to this JSON file")
+    frame.add_argument("--tolerance", type=float, default=0.25,
+                       help="allowed p95 slowdown vs the baseline (default 0.25)")
+    alloc = parser.add_argument_group("alloc benchmark")
+    alloc.add_argument("--max-retained-kb", type=float, default=48,
+                       help="exit 1 when a scenario keeps more than this (default 48)")
+    alloc.add_argument("--max-blocks", type=int, default=200,
+                       help="exit 1 when a scenario keeps more blocks than this (default 200)")
+    alloc.add_argument("--max-peak-kb", type=float, default=16,
+                       help="exit 1 when an idle/typical frame peaks above this (default 16)")
+    alloc.add_argument("--max-gc-runs", type=int, default=0,
+                       help="exit 1 when idle/typical trigger more GC runs (default 0)")
+    args = parser.parse_args()
+
+    if args.bench == "frame":
+        sys.exit(bench_frame(
+            entities=args.entities, frames=args.frames, scenarios=args.scenario,
+            replay=args.replay, baseline=args.baseline,
+            save_baseline=args.save_baseline, tolerance=args.tolerance, waves=args.waves,
+        ))
+    if args.bench == "alloc":
+        sys.exit(bench_alloc(
+            entities=args.entities, frames=args.frames,
+            max_retained_kb=args.max_retained_kb, max_blocks=args.max_blocks,
+            max_peak_kb=args.max_peak_kb, max_gc_runs=args.max_gc_runs, waves=args.waves,
+        ))
+    BENCHES[args.bench](entities=args.entities, frames=args.frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import random
+
+import numpy as np
+
+from game import Inputs, NO_INPUT, PLANET_W, PLANET_H
+from settings import WIDTH, SHIP_SIZE, UFO_SIZE, METEOR_SIZE
+
+# ---------------------------------------------------------
+# BOT POLICIES
+# ---------------------------------------------------------
+# A policy is called once per simulation step with the GameState
+# and returns that step's Inputs. Policies that use randomness get
+# their own seeded RNG, so a (policy, seed) pair always plays the
+# same game.
+
+
+def idle(seed):
+    """Never moves, never fires"""
+    return lambda state: NO_INPUT
+
+
+def random_keys(seed, change=0.05):
+    """Holds a random key combination, switching now and then"""
+    rng = random.Random(seed)
+    keys = [NO_INPUT]
+
+    def policy(state):
+        if rng.random() < change:
+            keys[0] = Inputs(rng.random() < 0.4, rng.random() < 0.4, rng.random() < 0.7)
+        return keys[0]
+
+    return policy
+
+
+def _steer(state, target, fire=True):
+    centre = state.px + SHIP_SIZE[0] // 2
+    return Inputs(centre > target + 10, centre < target - 10, fire)
+
+
+def hunter(seed):
+    """Steers under the lowest UFO and keeps firing"""
+
+    def policy(state):
+        enemies = state.enemies
+        target = WIDTH // 2
+        if enemies.n:
+            k = int(np.argmax(enemies.y[:enemies.n]))
+            target = enemies.x[k] + UFO_SIZE[0] // 2
+        return _steer(state, target)
+
+    return policy
+
+
+def dodger(seed, lookahead=300):
+    """Hunts UFOs, but first slides out of the path of meteors and planets"""
+    hunt = hunter(seed)
+
+    def policy(state):
+        ship_l, ship_r = state.px, state.px + SHIP_SIZE[0]
+        ship_top = state.py
+
+        # Where each falling rock will be horizontally when it reaches
+        # the ship's top edge
+        meteors, planets = state.meteors, state.planets
+        m, p = meteors.n, planets.n
+        kind = planets.aux[:p].astype(np.intp)
+        x = np.concatenate((meteors.x[:m], planets.x[:p]))
+        w = np.concatenate((np.full(m, METEOR_SIZE[0]), PLANET_W[kind]))
+        h = np.concatenate((np.full(m, METEOR_SIZE[1]), PLANET_H[kind]))
+        bottom = np.concatenate((meteors.y[:m], planets.y[:p])) + h
+        vx = np.concatenate((meteors.vx[:m], planets.vx[:p]))
+        vy = np.concatenate((meteors.vy[:m], planets.vy[:p]))
+
+        near = (bottom > ship_top - lookahead) & (bottom - h < ship_top + SHIP_SIZE[1])
+        frames = np.maximum(0, ship_top - bottom[near]) / vy[near]
+        lo = x[near] + vx[near] * frames
+        hi = lo + w[near]
+
+        for lo, hi in zip(lo.tolist(), hi.tolist()):
+            if lo < ship_r and ship_l < hi:
+                # Go round whichever side is closer and still on screen
+                go_left = (ship_r - lo) < (hi - ship_l)
+                if go_left and lo - SHIP_SIZE[0] < 0:
+                    go_left = False
+                elif not go_left and hi + SHIP_SIZE[0] > WIDTH:
+                    go_left = True
+                return Inputs(go_left, not go_left, True)
+        return hunt(state)
+
+    return policy
+
+
+POLICIES = {
+    "idle": idle,
+    "random": random_keys,
+    "hunter": hunter,
+    "dodger": dodger,
+}
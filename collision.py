@@ -0,0 +1,220 @@
+import numpy as np
+import pygame
+
+from assets import ASSETS
+from settings import WIDTH, HEIGHT, PLANET_SIZES
+
+# ---------------------------------------------------------
+# BATCHED COLLISION TESTS
+# ---------------------------------------------------------
+# All tests follow pygame.Rect.colliderect semantics: positions
+# are truncated to ints and touching edges do not collide.
+
+# Below this many pairs the dense n x m test beats sorting
+DENSE_LIMIT = 16384
+
+
+def colliderect(ax, ay, aw, ah, bx, by, bw, bh):
+    """Element-wise Rect.colliderect (inputs broadcast together)"""
+    ax = np.trunc(ax)
+    ay = np.trunc(ay)
+    bx = np.trunc(bx)
+    by = np.trunc(by)
+    return (ax < bx + bw) & (bx < ax + aw) & (ay < by + bh) & (by < ay + ah)
+
+
+def overlap(ax, ay, aw, ah, bx, by, bw, bh):
+    """Pairwise Rect.colliderect between two sets of boxes.
+
+    Returns a (len(a), len(b)) boolean matrix, or a (len(b),)
+    vector when box a is given as scalars.
+    """
+    return colliderect(
+        np.asarray(ax)[..., None], np.asarray(ay)[..., None],
+        np.asarray(aw)[..., None], np.asarray(ah)[..., None],
+        bx, by, bw, bh,
+    )
+
+
+def overlap_any(x, y, w, h, bx, by, bw, bh):
+    """True if the single box (x, y, w, h) hits any of the b boxes"""
+    if len(bx) == 0:
+        return False
+    return bool(overlap(x, y, w, h, bx, by, bw, bh).any())
+
+
+# ---------------------------------------------------------
+# BROAD PHASE — UNIFORM GRID OVER THE PLAY FIELD
+# ---------------------------------------------------------
+CELL = 64
+COLS = WIDTH // CELL + 1
+ROWS = HEIGHT // CELL + 1
+
+
+def _cells(v, count):
+    # Off-field positions clamp to the border cells, which keeps
+    # the lookup conservative
+    return np.clip(v // CELL, 0, count - 1).astype(np.intp)
+
+
+def _ranges(starts, counts):
+    """Concatenated arange(s, s + c) for every (s, c) pair"""
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(starts - offsets, counts) + np.arange(int(counts.sum()))
+
+
+def candidate_pairs(ax, ay, aw, ah, bx, by, bw, bh):
+    """Index pairs (i, j) of a and b boxes that share grid cells.
+
+    The b boxes are bucketed by the cell of their top-left corner
+    with one sort; each a box then reads one contiguous bucket range
+    per grid row it covers. Cost is O((n + m) log m + k) for k
+    candidates instead of O(n * m).
+    """
+    n = len(ax)
+    ax, ay = np.trunc(ax), np.trunc(ay)
+    bx, by = np.trunc(bx), np.trunc(by)
+
+    key = _cells(by, ROWS) * COLS + _cells(bx, COLS)
+    order = np.argsort(key, kind="stable")
+    start = np.zeros(ROWS * COLS + 1, dtype=np.intp)
+    np.cumsum(np.bincount(key, minlength=ROWS * COLS), out=start[1:])
+
+    # A b corner can only reach a box inside
+    # (ax - max bw, ax + aw) x (ay - max bh, ay + ah)
+    cx0 = _cells(ax - np.max(bw), COLS)
+    cx1 = _cells(ax + aw, COLS)
+    cy0 = _cells(ay - np.max(bh), ROWS)
+    cy1 = _cells(ay + ah, ROWS)
+
+    rows_per_box = cy1 - cy0 + 1
+    ai = np.repeat(np.arange(n), rows_per_box)
+    row = _ranges(cy0, rows_per_box)
+
+    lo = start[row * COLS + cx0[ai]]
+    hi = start[row * COLS + cx1[ai] + 1]
+    counts = hi - lo
+
+    return np.repeat(ai, counts), order[_ranges(lo, counts)]
+
+
+def hit_pairs(ax, ay, aw, ah, bx, by, bw, bh):
+    """All colliding pairs (i, j), ordered by i then j.
+
+    Small sets use the dense test directly; larger ones go through
+    the broad phase and only the candidates are tested exactly.
+    """
+    n, m = len(ax), len(bx)
+    if n == 0 or m == 0:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty
+
+    if n * m <= DENSE_LIMIT:
+        return np.nonzero(overlap(ax, ay, aw, ah, bx, by, bw, bh))
+
+    i, j = candidate_pairs(ax, ay, aw, ah, bx, by, bw, bh)
+    aw = np.broadcast_to(aw, (n,))
+    ah = np.broadcast_to(ah, (n,))
+    bw = np.broadcast_to(bw, (m,))
+    bh = np.broadcast_to(bh, (m,))
+
+    hit = colliderect(ax[i], ay[i], aw[i], ah[i], bx[j], by[j], bw[j], bh[j])
+    i, j = i[hit], j[hit]
+
+    order = np.lexsort((j, i))
+    return i[order], j[order]
+
+
+def any_hit(ax, ay, aw, ah, bx, by, bw, bh):
+    """Boolean per a box: does it hit any b box"""
+    result = np.zeros(len(ax), dtype=bool)
+    i, _ = hit_pairs(ax, ay, aw, ah, bx, by, bw, bh)
+    result[i] = True
+    return result
+
+
+def first_hits(i, j, test=None):
+    """Pair each a box with its first unused b box, in a order.
+
+    `i`, `j` are the sorted pairs from hit_pairs(); this mirrors the
+    "each bullet removes at most one target" rule. An optional
+    `test(k)` narrow phase is only asked about pairs that could still
+    be taken.
+    """
+    pairs = []
+    used = set()
+    last = -1
+    for k, (a, b) in enumerate(zip(i.tolist(), j.tolist())):
+        if a == last or b in used:
+            continue
+        if test is not None and not test(k):
+            continue
+        used.add(b)
+        pairs.append((a, b))
+        last = a
+    return pairs
+
+
+# ---------------------------------------------------------
+# PIXEL MASKS (narrow phase)
+# ---------------------------------------------------------
+# Masks are built once from the scaled sprites; the rect tests
+# above act as the pre-check and Mask.overlap only runs for pairs
+# whose rects already touch.
+
+_masks = None
+
+
+def load_masks():
+    """Masks for every scaled gameplay sprite, built on first use"""
+    global _masks
+    if _masks is None:
+        def build(name):
+            return pygame.mask.from_surface(ASSETS.sprite_surface(name))
+
+        _masks = {
+            "ship": build("ship"),
+            "ufo": build("ufo"),
+            "bullet": build("bullet"),
+            "meteor": build("meteor"),
+            "planets": [build(f"planet{k + 1}") for k in range(len(PLANET_SIZES))],
+        }
+    return _masks
+
+
+def _mask_at(masks, k):
+    return masks if isinstance(masks, pygame.mask.Mask) else masks[k]
+
+
+def mask_test(i, j, ax, ay, amasks, bx, by, bmasks):
+    """Narrow-phase test for the rect-hit pairs (i, j): test(k) is True
+    when the masks of pair k overlap.
+
+    `amasks`/`bmasks` are a single Mask shared by every box or a
+    sequence with one Mask per box.
+    """
+    dx = (np.trunc(bx[j]) - np.trunc(ax[i])).astype(np.intp).tolist()
+    dy = (np.trunc(by[j]) - np.trunc(ay[i])).astype(np.intp).tolist()
+    ia, jb = i.tolist(), j.tolist()
+    a_single = isinstance(amasks, pygame.mask.Mask)
+    b_single = isinstance(bmasks, pygame.mask.Mask)
+
+    def test(k):
+        am = amasks if a_single else amasks[ia[k]]
+        bm = bmasks if b_single else bmasks[jb[k]]
+        return am.overlap(bm, (dx[k], dy[k])) is not None
+
+    return test
+
+
+def mask_hit_any(x, y, mask, bx, by, bw, bh, bmasks):
+    """True if the single sprite at (x, y) touches any b sprite pixel"""
+    if len(bx) == 0:
+        return False
+    w, h = mask.get_size()
+    j = np.flatnonzero(overlap(x, y, w, h, bx, by, bw, bh))
+    if len(j) == 0:
+        return False
+    i = np.zeros(len(j), dtype=np.intp)
+    test = mask_test(i, j, np.array([x]), np.array([y]), mask, bx, by, bmasks)
+    return any(test(k) for k in range(len(j)))
@@ -1,42 +1,571 @@
+import atexit
+import bisect
+import json
+import logging
+import queue
 import sqlite3
+import threading
+import time
 
 DB_NAME = "game_stats.db"
 
+log = logging.getLogger(__name__)
+
+# Reads on the game thread give up quickly; the writer thread can
+# afford to wait out another process holding the lock
+READ_TIMEOUT = 1.0
+WRITE_TIMEOUT = 5.0
+
+_conn = None
+_writer = None
+
+
+def _connect(timeout):
+    conn = sqlite3.connect(DB_NAME, timeout=timeout)
+    # WAL lets the menus read while the writer thread commits
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def get_connection():
+    """Persistent connection for reads on the game thread"""
+    global _conn
+    if _conn is None:
+        _conn = _connect(READ_TIMEOUT)
+    return _conn
+
+
+# ---------------------------------------------------------
+# WRITE-BEHIND QUEUE
+# ---------------------------------------------------------
+def _is_busy(message):
+    """True for SQLITE_BUSY / SQLITE_LOCKED, the errors worth retrying"""
+    return "locked" in message or "busy" in message
+
+
+class StatsWriter(threading.Thread):
+    """Background thread that commits queued inserts in batches.
+
+    submit() and submit_many() never block the caller. The thread
+    drains everything queued so far into one transaction, and retries
+    with backoff while the database is locked or busy, up to
+    `max_retries` times. Any other error drops the batch.
+    """
+
+    _STOP = object()
+
+    def __init__(self, batch_size=256, retry_delay=0.05, max_retry_delay=2.0, max_retries=20):
+        super().__init__(name="stats-writer", daemon=True)
+        self.queue = queue.Queue()
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_retries = max_retries
+        self._stopping = False
+
+    def submit(self, sql, params):
+        self.queue.put((sql, [params]))
+
+    def submit_many(self, sql, rows):
+        """Queue many rows of one statement as a single item"""
+        self.queue.put((sql, rows))
+
+    def call(self, fn):
+        """Run fn(conn) on the writer thread once everything submitted so far is committed"""
+        self.queue.put(fn)
+
+    def flush(self, timeout=None):
+        """Wait until everything submitted so far is committed"""
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=WRITE_TIMEOUT):
+        self._stopping = True
+        self.queue.put(self._STOP)
+        self.join(timeout)
+
+    def _take_batch(self):
+        batch = [self.queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _commit(self, conn, items):
+        # Group consecutive items of the same statement for executemany
+        delay = self.retry_delay
+        count = sum(len(rows) for _, rows in items)
+        for attempt in range(self.max_retries + 1):
+            try:
+                with conn:
+                    start = 0
+                    while start < len(items):
+                        sql = items[start][0]
+                        end = start
+                        while end < len(items) and items[end][0] == sql:
+                            end += 1
+                        conn.executemany(sql, [params for _, rows in items[start:end] for params in rows])
+                        start = end
+                return
+            except sqlite3.Error as exc:
+                # Only another connection holding the lock goes away by
+                # itself. Retrying cannot fix a constraint failure, a
+                # read-only or missing file or a disk error; drop the
+                # batch and keep the thread serving
+                message = str(exc)
+                if not isinstance(exc, sqlite3.OperationalError) or not _is_busy(message):
+                    log.error("dropping %d stats rows: %s", count, message)
+                    return
+                if self._stopping:
+                    log.warning("dropping %d stats rows on shutdown: %s", count, message)
+                    return
+                if attempt < self.max_retries:
+                    log.debug("stats write failed, retrying: %s", message)
+                    time.sleep(delay)
+                    delay = min(delay * 2, self.max_retry_delay)
+        log.error("dropping %d stats rows after %d retries: %s", count, self.max_retries, message)
+
+    def run(self):
+        conn = _connect(WRITE_TIMEOUT)
+        try:
+            while True:
+                batch = self._take_batch()
+                items = []
+                for item in batch:
+                    if isinstance(item, tuple):
+                        items.append(item)
+                    elif callable(item):
+                        if items:
+                            self._commit(conn, items)
+                            items = []
+                        item(conn)
+                if items:
+                    self._commit(conn, items)
+                for item in batch:
+                    if isinstance(item, threading.Event):
+                        item.set()
+                if any(item is self._STOP for item in batch):
+                    return
+        finally:
+            conn.close()
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        _writer = StatsWriter()
+        _writer.start()
+    return _writer
+
+
+def close_db():
+    """Flush pending writes and close connections (also runs at exit)"""
+    global _conn, _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
+    if _conn is not None:
+        _conn.close()
+        _conn = None
+
+
+atexit.register(close_db)
+
+
+# ---------------------------------------------------------
+# SCHEMA + MIGRATIONS (tracked with PRAGMA user_version)
+# ---------------------------------------------------------
+def _migrate(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+    if version < 1:
+        # Run timestamps and a score index for the leaderboard
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(stats)")]
+        if "created_at" not in columns:
+            conn.execute("ALTER TABLE stats ADD COLUMN created_at REAL")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_stats_score ON stats (score DESC)")
+        conn.execute("PRAGMA user_version = 1")
+
+    if version < 2:
+        # Bot runs from simulate.py, kept apart from player stats
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sim_batches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL,
+                policy TEXT,
+                games INTEGER,
+                params TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sim_runs (
+                batch_id INTEGER REFERENCES sim_batches (id),
+                seed INTEGER,
+                score INTEGER,
+                kills INTEGER,
+                frames INTEGER,
+                distance INTEGER,
+                cause TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sim_runs_batch ON sim_runs (batch_id)")
+        conn.execute("PRAGMA user_version = 2")
+
+    if version < 3:
+        # Gameplay telemetry: one row per played session, its events
+        # (t is game time in ms) and per-second frame time samples
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at REAL,
+                ended_at REAL,
+                seed INTEGER,
+                score INTEGER,
+                kills INTEGER,
+                frames INTEGER
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                session_id INTEGER REFERENCES sessions (id),
+                t REAL,
+                kind TEXT,
+                detail TEXT,
+                x REAL,
+                y REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_events_session ON events (session_id, kind)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_events_kind ON events (kind, detail)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS frame_samples (
+                session_id INTEGER REFERENCES sessions (id),
+                t REAL,
+                frames INTEGER,
+                mean_ms REAL,
+                max_ms REAL,
+                entities INTEGER
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_frame_samples_session ON frame_samples (session_id)")
+        conn.execute("PRAGMA user_version = 3")
+
+    if version < 4:
+        # Render quality tier (quality.py) in effect for each frame sample
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(frame_samples)")]
+        if "quality" not in columns:
+            conn.execute("ALTER TABLE frame_samples ADD COLUMN quality TEXT")
+        conn.execute("PRAGMA user_version = 4")
+
+
 def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS stats (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            score INTEGER,
-            kills INTEGER
-        )
-    """)
-    conn.commit()
-    conn.close()
+    conn = get_connection()
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS stats (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                score INTEGER,
+                kills INTEGER
+            )
+        """)
+        _migrate(conn)
+    get_writer()
+    get_leaderboard()
+
+
+# ---------------------------------------------------------
+# LEADERBOARD (cached top-N + indexed queries)
+# ---------------------------------------------------------
+class Leaderboard:
+    """Best runs, highest score first.
+
+    The top `size` rows and the run count are loaded once, on the
+    writer thread (see start()), then kept current in memory as runs
+    are recorded, so neither game over nor the stats screen waits on
+    the database. Pages past the cache, ranks and percentiles are
+    indexed queries, made after the queued writes have landed.
+    """
+
+    def __init__(self, size=100):
+        self.size = size
+        self.top = None     # [(score, kills)], best first
+        self._keys = None   # -score per row, for bisect
+        self._pages = {}    # (page, per_page) -> rows past the cached top
+        self.total = 0
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._early = []    # runs added before load() ran
+
+    def start(self):
+        """Queue load() behind the writes submitted so far"""
+        get_writer().call(self.load)
+
+    def load(self, conn):
+        try:
+            top = conn.execute("""
+                SELECT score, kills
+                FROM stats
+                ORDER BY score DESC, id
+                LIMIT ?
+            """, (self.size,)).fetchall()
+            total = conn.execute("SELECT COUNT(*) FROM stats").fetchone()[0]
+        except sqlite3.Error as exc:
+            log.error("leaderboard not loaded: %s", exc)
+            top, total = [], 0
+        with self._lock:
+            self.top = top
+            self._keys = [-score for score, _ in top]
+            self._pages.clear()
+            self.total = total
+            # Their inserts were queued after this load, so it did not
+            # see them
+            for score, kills in self._early:
+                self._insert(score, kills)
+            self._early = None
+        self._loaded.set()
+
+    def _ensure_loaded(self):
+        # Only waits when the stats screen opens right at startup
+        self._loaded.wait()
+
+    def _sync(self):
+        """Let queued runs land before asking the database about them"""
+        get_writer().flush(READ_TIMEOUT)
+
+    def add(self, score, kills):
+        """Record a new run in the cached top-N (ties go after older runs)"""
+        with self._lock:
+            if self._early is not None:
+                self._early.append((score, kills))
+            else:
+                self._insert(score, kills)
+
+    def _insert(self, score, kills):
+        self.total += 1
+        self._pages.clear()
+        pos = bisect.bisect_right(self._keys, -score)
+        if pos < self.size:
+            self._keys.insert(pos, -score)
+            self.top.insert(pos, (score, kills))
+            del self._keys[self.size:]
+            del self.top[self.size:]
+
+    def page(self, page, per_page=10):
+        """Rows for a 0-based page"""
+        self._ensure_loaded()
+        start = page * per_page
+        end = start + per_page
+        if end <= len(self.top) or len(self.top) < self.size:
+            return self.top[start:end]
+
+        key = (page, per_page)
+        rows = self._pages.get(key)
+        if rows is None:
+            self._sync()
+            rows = get_connection().execute("""
+                SELECT score, kills
+                FROM stats
+                ORDER BY score DESC, id
+                LIMIT ? OFFSET ?
+            """, (per_page, start)).fetchall()
+            self._pages[key] = rows
+        return rows
+
+    def page_count(self, per_page=10):
+        self._ensure_loaded()
+        return max(1, -(-self.total // per_page))
+
+    def rank(self, score):
+        """1-based position a run with `score` holds among recorded runs"""
+        self._sync()
+        better = get_connection().execute(
+            "SELECT COUNT(*) FROM stats WHERE score > ?", (score,)
+        ).fetchone()[0]
+        return better + 1
+
+    def percentile(self, score):
+        """Share of recorded runs (0-100) scoring at or below `score`"""
+        self._sync()
+        conn = get_connection()
+        total = conn.execute("SELECT COUNT(*) FROM stats").fetchone()[0]
+        if total == 0:
+            return 100.0
+        at_or_below = conn.execute(
+            "SELECT COUNT(*) FROM stats WHERE score <= ?", (score,)
+        ).fetchone()[0]
+        return 100.0 * at_or_below / total
+
+
+_leaderboard = None
+
+
+def get_leaderboard():
+    global _leaderboard
+    if _leaderboard is None:
+        _leaderboard = Leaderboard()
+        _leaderboard.start()
+    return _leaderboard
 
 
 def update_stats(score, kills):
-    """Insert final game stats into database"""
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("INSERT INTO stats (score, kills) VALUES (?, ?)", (score, kills))
-    conn.commit()
-    conn.close()
+    """Queue final game stats for the background writer"""
+    # Cache first: a board created after the insert is queued would
+    # load the committed row and then add it a second time
+    get_leaderboard().add(score, kills)
+    get_writer().submit(
+        "INSERT INTO stats (score, kills, created_at) VALUES (?, ?, ?)",
+        (score, kills, time.time()),
+    )
+
+
+# ---------------------------------------------------------
+# BATCH SIMULATION RESULTS
+# ---------------------------------------------------------
+def create_sim_batch(policy, games, params):
+    """Register a simulate.py batch; `params` is stored as JSON"""
+    conn = get_connection()
+    with conn:
+        cur = conn.execute(
+            "INSERT INTO sim_batches (created_at, policy, games, params) VALUES (?, ?, ?, ?)",
+            (time.time(), policy, games, json.dumps(params, sort_keys=True)),
+        )
+    return cur.lastrowid
+
+
+def insert_sim_runs(batch_id, runs):
+    """Bulk insert (seed, score, kills, frames, distance, cause) rows in one transaction"""
+    conn = get_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO sim_runs (batch_id, seed, score, kills, frames, distance, cause)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(batch_id, *run) for run in runs],
+        )
+
+
+# ---------------------------------------------------------
+# GAMEPLAY TELEMETRY
+# ---------------------------------------------------------
+EVENT_SQL = "INSERT INTO events (session_id, t, kind, detail, x, y) VALUES (?, ?, ?, ?, ?, ?)"
+FRAME_SAMPLE_SQL = (
+    "INSERT INTO frame_samples (session_id, t, frames, mean_ms, max_ms, entities, quality)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def start_session(seed):
+    """Register a played game and return its session id (call between screens)"""
+    conn = get_connection()
+    with conn:
+        cur = conn.execute(
+            "INSERT INTO sessions (started_at, seed) VALUES (?, ?)", (time.time(), seed)
+        )
+    return cur.lastrowid
+
+
+def end_session(session_id, score, kills, frames):
+    """Queue the session's result behind its last events"""
+    get_writer().submit(
+        "UPDATE sessions SET ended_at = ?, score = ?, kills = ?, frames = ? WHERE id = ?",
+        (time.time(), score, kills, frames, session_id),
+    )
+
+
+def submit_events(rows):
+    """Queue (session_id, t, kind, detail, x, y) rows as one batch"""
+    get_writer().submit_many(EVENT_SQL, rows)
+
+
+def submit_frame_samples(rows):
+    """Queue (session_id, t, frames, mean_ms, max_ms, entities, quality) rows as one batch"""
+    get_writer().submit_many(FRAME_SAMPLE_SQL, rows)
+
+
+# Aggregates over all sessions, or one when `session_id` is given.
+# They read committed rows: flush the writer first to include a
+# session still being played.
+
+def _session_filter(session_id, prefix="WHERE"):
+    if session_id is None:
+        return "", ()
+    return f" {prefix} session_id = ?", (session_id,)
+
+
+def session_summaries(limit=20):
+    """Latest sessions: (id, started_at, seed, score, kills, frames,
+    lives lost, mean frame ms, worst frame ms)"""
+    return get_connection().execute("""
+        SELECT s.id, s.started_at, s.seed, s.score, s.kills, s.frames,
+               (SELECT COUNT(*) FROM events e WHERE e.session_id = s.id AND e.kind = 'life_lost'),
+               (SELECT SUM(f.mean_ms * f.frames) / SUM(f.frames) FROM frame_samples f WHERE f.session_id = s.id),
+               (SELECT MAX(f.max_ms) FROM frame_samples f WHERE f.session_id = s.id)
+        FROM sessions s
+        ORDER BY s.id DESC
+        LIMIT ?
+    """, (limit,)).fetchall()
+
+
+def event_counts(session_id=None):
+    """{(kind, detail): count}"""
+    where, params = _session_filter(session_id)
+    rows = get_connection().execute(
+        f"SELECT kind, detail, COUNT(*) FROM events{where} GROUP BY kind, detail", params
+    ).fetchall()
+    return {(kind, detail): n for kind, detail, n in rows}
+
+
+def death_causes(session_id=None):
+    """{cause: lives lost to it}"""
+    return {detail: n for (kind, detail), n in event_counts(session_id).items() if kind == "life_lost"}
+
+
+def death_heatmap(cell=100, session_id=None):
+    """{(column, row): lives lost} on a grid of `cell` px squares"""
+    where, params = _session_filter(session_id, "AND")
+    rows = get_connection().execute(f"""
+        SELECT CAST(x / ? AS INTEGER), CAST(y / ? AS INTEGER), COUNT(*)
+        FROM events
+        WHERE kind = 'life_lost'{where}
+        GROUP BY 1, 2
+    """, (cell, cell, *params)).fetchall()
+    return {(cx, cy): n for cx, cy, n in rows}
+
+
+def frame_time_by_load(bucket=10, session_id=None):
+    """(entities bucket start, seconds sampled, mean ms, worst ms) rows:
+    how frame time grows with the number of live entities"""
+    where, params = _session_filter(session_id)
+    return get_connection().execute(f"""
+        SELECT (entities / ?) * ?, COUNT(*), SUM(mean_ms * frames) / SUM(frames), MAX(max_ms)
+        FROM frame_samples{where}
+        GROUP BY 1
+        ORDER BY 1
+    """, (bucket, bucket, *params)).fetchall()
+
+
+def frame_time_by_quality(session_id=None):
+    """(quality tier, seconds sampled, mean ms, worst ms) rows, most time first"""
+    where, params = _session_filter(session_id)
+    return get_connection().execute(f"""
+        SELECT quality, COUNT(*), SUM(mean_ms * frames) / SUM(frames), MAX(max_ms)
+        FROM frame_samples{where}
+        GROUP BY 1
+        ORDER BY 2 DESC
+    """, params).fetchall()
+
+
+def iter_events(session_id=None):
+    """Every event row, in recording order, for export"""
+    where, params = _session_filter(session_id)
+    return get_connection().execute(
+        f"SELECT session_id, t, kind, detail, x, y FROM events{where} ORDER BY rowid", params
+    )
 
 
 def get_high_scores():
     """Return top  highest scores for the stats page"""
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT score, kills
-        FROM stats
-        ORDER BY score DESC
-        LIMIT 10
-    """)
-
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    return get_leaderboard().page(0)
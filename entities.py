@@ -0,0 +1,122 @@
+import numpy as np
+
+# ---------------------------------------------------------
+# STRUCT-OF-ARRAYS ENTITY STORE
+# ---------------------------------------------------------
+# One pool per entity kind (bullets, UFOs, meteors, planets,
+# explosions). Live entities occupy slots [0, n) in spawn order,
+# so movement, culling and expiry are single NumPy operations
+# over slices instead of per-element Python loops.
+
+
+class EntityPool:
+    """Positions, velocities, an aux value and alive flags in NumPy arrays.
+
+    `aux` holds the per-kind extra field: UFO drift, planet sprite
+    index or explosion spawn time. Kinds that need more name them in
+    `fields`; each becomes an array attribute that starts at 0 on
+    spawn. `prev_x`/`prev_y` hold positions from before the last
+    step, for drawing between two steps.
+    """
+
+    def __init__(self, capacity=64, fields=()):
+        self.n = 0
+        self.fields = tuple(fields)
+        self._alloc(capacity)
+
+    def _alloc(self, capacity):
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.prev_x = np.zeros(capacity)
+        self.prev_y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.aux = np.zeros(capacity)
+        for name in self.fields:
+            setattr(self, name, np.zeros(capacity))
+        self.alive = np.zeros(capacity, dtype=bool)
+
+    def _arrays(self):
+        extra = tuple(getattr(self, name) for name in self.fields)
+        return (self.x, self.y, self.prev_x, self.prev_y, self.vx, self.vy, self.aux) + extra + (self.alive,)
+
+    def _grow(self):
+        old = self._arrays()
+        self._alloc(len(self.x) * 2)
+        for dst, src in zip(self._arrays(), old):
+            dst[:self.n] = src[:self.n]
+
+    def __len__(self):
+        return self.n
+
+    def spawn(self, x, y, vx=0.0, vy=0.0, aux=0.0):
+        if self.n == len(self.x):
+            self._grow()
+        i = self.n
+        self.x[i] = self.prev_x[i] = x
+        self.y[i] = self.prev_y[i] = y
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.aux[i] = aux
+        for name in self.fields:
+            getattr(self, name)[i] = 0.0
+        self.alive[i] = True
+        self.n += 1
+        return i
+
+    def clear(self):
+        self.alive[:self.n] = False
+        self.n = 0
+
+    def move(self):
+        """Advance every live entity by its velocity"""
+        n = self.n
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+
+    def kill(self, i):
+        self.alive[i] = False
+
+    def cull(self, dead):
+        """Mark entities dead where the boolean array `dead` is set"""
+        self.alive[:self.n] &= ~dead
+
+    def compact(self):
+        """Drop dead entities, keeping survivors in spawn order"""
+        n = self.n
+        keep = self.alive[:n]
+        m = int(np.count_nonzero(keep))
+        if m == n:
+            return
+        for arr in self._arrays()[:-1]:
+            arr[:m] = arr[:n][keep]
+        self.alive[:m] = True
+        self.alive[m:n] = False
+        self.n = m
+
+    def snapshot(self):
+        """Remember current positions as the previous step's"""
+        n = self.n
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+
+    def _blend(self, alpha):
+        n = self.n
+        if alpha >= 1:
+            return self.x[:n], self.y[:n]
+        px, py = self.prev_x[:n], self.prev_y[:n]
+        return px + (self.x[:n] - px) * alpha, py + (self.y[:n] - py) * alpha
+
+    def positions(self, alpha=1.0):
+        """(xs, ys) of live entities as plain Python lists.
+
+        With `alpha` < 1 the positions are blended from the previous
+        step's towards the current ones.
+        """
+        xs, ys = self._blend(alpha)
+        return xs.tolist(), ys.tolist()
+
+    def rows(self, alpha=1.0):
+        """(x, y, aux) tuples for live entities, as plain Python numbers"""
+        xs, ys = self._blend(alpha)
+        return zip(xs.tolist(), ys.tolist(), self.aux[:self.n].tolist())
@@ -0,0 +1,386 @@
+import random
+from collections import namedtuple
+
+import numpy as np
+
+from collision import (
+    hit_pairs, first_hits, overlap,
+    load_masks, mask_test, mask_hit_any,
+)
+from entities import EntityPool
+from placement import place_planet
+from spawner import SpawnScheduler, load_waves
+from steering import PlanetField
+from settings import (
+    WIDTH, HEIGHT, FPS,
+    SHIP_SIZE, UFO_SIZE, BULLET_SIZE, METEOR_SIZE, PLANET_SIZES,
+)
+
+# ---------------------------------------------------------
+# HEADLESS SIMULATION CORE
+# ---------------------------------------------------------
+# Everything here runs without a window, a clock or any
+# rendering, so the same rules can drive the interactive game,
+# bots, load tests and regression checks.
+
+FRAME_MS = 1000 / FPS
+DISTANCE_PER_FRAME = 2
+
+# Bump whenever a change makes the same seed and inputs play out
+# differently; recordings from other versions are refused
+RULES_VERSION = 4
+
+# Spawn pacing comes from a wave file (see spawner.py). When a
+# planet finds no room it is tried again this many ticks of its
+# stream's clock later.
+PLANET_RETRY = 20
+
+BULLET_W, BULLET_H = int(BULLET_SIZE[0]), int(BULLET_SIZE[1])
+UFO_AVOID_COOLDOWN = 300
+PAUSE_DURATION = 1200
+INVINCIBLE_DURATION = 1500
+SMALL_EXPL_DURATION = 240
+
+PLANET_W = np.array([w for w, h in PLANET_SIZES])
+PLANET_H = np.array([h for w, h in PLANET_SIZES])
+
+Inputs = namedtuple("Inputs", ["left", "right", "fire"])
+NO_INPUT = Inputs(False, False, False)
+
+
+class GameState:
+    """All mutable state of one run"""
+
+    def __init__(self, seed=None, waves=None):
+        self.rng = random.Random(seed)
+        self.now = 0
+        self.masks = load_masks()
+
+        # Spawns draw from their own stream, so the timeline depends
+        # only on the seed and the waves, not on how the run plays
+        self.spawn_rng = random.Random(self.rng.getrandbits(64))
+        self.spawner = SpawnScheduler(waves or load_waves(), self.spawn_rng)
+
+        self.bullets = EntityPool(16)
+        self.enemies = EntityPool(fields=("avoid_until",))  # aux = drift
+        self.planets = EntityPool(16)         # aux = planet index
+        self.meteors = EntityPool(16)
+        self.small_explosions = EntityPool()  # aux = spawn time
+
+        self.ship_explosion = None
+        self.score = 0
+        self.kills = 0
+        self.lives = 3
+        self.deaths = []  # what hit the ship, per life lost
+
+        self.paused = False
+        self.pause_start = 0
+        self.invincible = False
+        self.inv_timer = 0
+        self.game_over = False
+
+        self.frame = 0  # frames played, not counting pauses
+        self.distance_traveled = 0
+        self.last_planet_used = None  # IMPORTANT: prevents planet repeats
+
+        # Ship position
+        self.px = WIDTH // 2 - SHIP_SIZE[0] // 2
+        self.py = HEIGHT - 150
+        self.prev_ship = (self.px, self.py)
+
+        # Where the planets are, coarsely, for UFO steering
+        self.planet_field = PlanetField(PLANET_W, PLANET_H, UFO_SIZE)
+
+        # Optional profiler.FrameProfiler; step() marks its phases
+        self.profiler = None
+        # Optional list; step() appends (now, kind, detail, x, y) for
+        # spawns, UFO kills, meteor hits and lives lost
+        self.events = None
+
+
+def planet_sizes(planets):
+    idx = planets.aux[:planets.n].astype(np.intp)
+    return PLANET_W[idx], PLANET_H[idx]
+
+
+# ---------------------------------------------------------
+# SPAWNS
+# ---------------------------------------------------------
+def spawn_planet(state, rng, events):
+    """Place a planet (never the previous sprite); False when there is no room"""
+    planets = state.planets
+
+    # Choose planet NOT equal to previous one
+    idx = rng.randrange(len(PLANET_SIZES) - (state.last_planet_used is not None))
+    if state.last_planet_used is not None and idx >= state.last_planet_used:
+        idx += 1
+
+    # Place without overlap or too-close stacking
+    n = planets.n
+    pos = place_planet(rng, idx, planets.x[:n].tolist(), planets.y[:n].tolist(),
+                       planets.aux[:n].astype(np.intp).tolist())
+    if pos is None:
+        return False
+    planets.spawn(pos[0], pos[1], vy=2, aux=idx)
+    state.last_planet_used = idx
+    state.planet_field.invalidate()
+    if events is not None:
+        events.append((state.now, "spawn", "planet", pos[0], pos[1]))
+    return True
+
+
+def spawn_ufo(state, rng, events):
+    x = rng.randint(60, WIDTH - 100)
+    state.enemies.spawn(x, -80, vy=2)
+    if events is not None:
+        events.append((state.now, "spawn", "ufo", x, -80))
+
+
+def spawn_meteor(state, rng, events):
+    # Top right only
+    y = rng.randint(-120, -40)
+    state.meteors.spawn(WIDTH + 50, y, vx=-2.7, vy=3.2)
+    if events is not None:
+        events.append((state.now, "spawn", "meteor", WIDTH + 50, y))
+
+
+# ---------------------------------------------------------
+# LIFE LOST
+# ---------------------------------------------------------
+def start_life_lost_pause(state):
+    px, py = state.px, state.py
+
+    state.paused = True
+    state.pause_start = state.now
+    state.ship_explosion = (px - 30, py - 30)
+
+    state.invincible = True
+    state.inv_timer = state.now
+
+    state.enemies.clear()
+    state.meteors.clear()
+    state.bullets.clear()
+
+    planets = state.planets
+    n = planets.n
+    pw, ph = planet_sizes(planets)
+    planets.cull(overlap(px, py, SHIP_SIZE[0], SHIP_SIZE[1], planets.x[:n], planets.y[:n], pw, ph))
+    planets.compact()
+
+
+# ---------------------------------------------------------
+# PREVIOUS POSITIONS (for drawing between two steps)
+# ---------------------------------------------------------
+def snapshot(state):
+    state.prev_ship = (state.px, state.py)
+    for pool in (state.bullets, state.enemies, state.planets, state.meteors, state.small_explosions):
+        pool.snapshot()
+
+
+# ---------------------------------------------------------
+# ONE SIMULATION FRAME
+# ---------------------------------------------------------
+def step(state, inputs, now=None):
+    """Advance the game by one frame.
+
+    Time advances by one frame at FPS unless `now` (milliseconds) is
+    given. The game itself leaves it out, so timers count frames and a
+    seed plus the per-frame inputs reproduce a run exactly.
+    """
+    state.now = state.now + FRAME_MS if now is None else now
+    now = state.now
+    rng = state.rng
+    masks = state.masks
+    prof = state.profiler
+    events = state.events
+
+    if state.game_over:
+        return
+
+    # --------------------------------------
+    # PAUSE AFTER LIFE LOST
+    # --------------------------------------
+    if state.paused:
+        if now - state.pause_start >= PAUSE_DURATION:
+            state.paused = False
+            if state.lives <= 0:
+                state.game_over = True
+        return
+
+    # --------------------------------------
+    # SHIP MOVEMENT
+    # --------------------------------------
+    if inputs.left and state.px > 0:
+        state.px -= 5
+    if inputs.right and state.px < WIDTH - SHIP_SIZE[0]:
+        state.px += 5
+    px, py = state.px, state.py
+
+    bullets = state.bullets
+
+    # Smooth bullet fire
+    if inputs.fire and bullets.n < 9:
+        bullets.spawn(px + SHIP_SIZE[0] // 2 - 4, py - 12, vy=-12)
+
+    # --------------------------------------
+    # BULLET MOVEMENT
+    # --------------------------------------
+    bullets.move()
+    bullets.cull(bullets.y[:bullets.n] < -40)
+    bullets.compact()
+    if prof is not None:
+        prof.mark("movement")
+
+    # --------------------------------------
+    # FRAME + DISTANCE (the spawn clocks)
+    # --------------------------------------
+    state.frame += 1
+    state.distance_traveled += DISTANCE_PER_FRAME
+
+    # ====================================================
+    # SPAWNS DUE THIS FRAME (popped from the wave timeline)
+    # ====================================================
+    spawner, srng = state.spawner, state.spawn_rng
+    for kind, index in spawner.pop_due(state.frame, state.distance_traveled):
+        if kind == "planet":
+            if not spawn_planet(state, srng, events):
+                spawner.postpone(index, state.frame, state.distance_traveled, PLANET_RETRY)
+        elif kind == "ufo":
+            spawn_ufo(state, srng, events)
+        else:
+            spawn_meteor(state, srng, events)
+    if prof is not None:
+        prof.mark("spawn")
+
+    # Move planets
+    planets = state.planets
+    planets.move()
+    planets.cull(planets.y[:planets.n] > HEIGHT + 260)
+    planets.compact()
+    state.planet_field.update(planets)
+    if prof is not None:
+        prof.mark("movement")
+
+    # --------------------------------------
+    # UFO MOVEMENT
+    # --------------------------------------
+    enemies = state.enemies
+    n = enemies.n
+    ex, ey, drift = enemies.x[:n], enemies.y[:n], enemies.aux[:n]
+
+    # Avoid planets: a UFO that reaches the planet field while not
+    # already avoiding turns away from the planets under it (a coin
+    # flip when it is dead centre) and drifts, instead of chasing,
+    # for UFO_AVOID_COOLDOWN ms
+    avoid_until = enemies.avoid_until[:n]
+    touching, away = state.planet_field.query(ex, ey)
+    starting = np.flatnonzero(touching & (avoid_until <= now))
+    if len(starting):
+        side = np.sign(away[starting]).astype(float)
+        for k in np.flatnonzero(side == 0):
+            side[k] = 1 if rng.random() < 0.5 else -1
+        drift[starting] = side
+        avoid_until[starting] = now + UFO_AVOID_COOLDOWN
+
+    # Smooth chase
+    dx = px - ex
+    chase = np.where(dx > 15, 1.5, np.where(dx < -15, -1.5, dx * 0.03))
+    ex += np.where(avoid_until > now, drift * 1.25, chase)
+
+    # Clamp
+    np.clip(ex, 40, WIDTH - 140, out=ex)
+    ey += enemies.vy[:n]
+
+    # Remove if off screen
+    enemies.cull(ey > HEIGHT)
+    if prof is not None:
+        prof.mark("movement")
+
+    # Bullet hits UFO
+    nb = bullets.n
+    bx, by = bullets.x[:nb], bullets.y[:nb]
+    live = np.flatnonzero(enemies.alive[:n])
+    i, j = hit_pairs(ex[live], ey[live], UFO_SIZE[0], UFO_SIZE[1], bx, by, BULLET_W, BULLET_H)
+    test = mask_test(i, j, ex[live], ey[live], masks["ufo"], bx, by, masks["bullet"])
+    for i, j in first_hits(live[i], j, test):
+        state.small_explosions.spawn(ex[i], ey[i], aux=now)
+        enemies.kill(i)
+        bullets.kill(j)
+        state.score += 20
+        state.kills += 1
+        if events is not None:
+            events.append((now, "ufo_kill", None, float(ex[i]), float(ey[i])))
+
+    enemies.compact()
+    bullets.compact()
+
+    # Remove explosion sprites
+    expl = state.small_explosions
+    expl.cull(now - expl.aux[:expl.n] > SMALL_EXPL_DURATION)
+    expl.compact()
+    if prof is not None:
+        prof.mark("collisions")
+
+    # --------------------------------------
+    # METEOR MOVEMENT
+    # --------------------------------------
+    meteors = state.meteors
+    meteors.move()
+    meteors.cull(meteors.y[:meteors.n] > HEIGHT + 150)
+    meteors.compact()
+    if prof is not None:
+        prof.mark("movement")
+
+    # Bullet hits meteor
+    n, nb = meteors.n, bullets.n
+    mx, my = meteors.x[:n], meteors.y[:n]
+    bx, by = bullets.x[:nb], bullets.y[:nb]
+    i, j = hit_pairs(mx, my, METEOR_SIZE[0], METEOR_SIZE[1], bx, by, BULLET_W, BULLET_H)
+    test = mask_test(i, j, mx, my, masks["meteor"], bx, by, masks["bullet"])
+    for i, j in first_hits(i, j, test):
+        meteors.kill(i)
+        bullets.kill(j)
+        state.score += 10
+        state.small_explosions.spawn(meteors.x[i], meteors.y[i], aux=now)
+        if events is not None:
+            events.append((now, "meteor_hit", None, float(meteors.x[i]), float(meteors.y[i])))
+
+    meteors.compact()
+    bullets.compact()
+
+    # --------------------------------------
+    # INVINCIBILITY TIMEOUT
+    # --------------------------------------
+    if state.invincible and now - state.inv_timer > INVINCIBLE_DURATION:
+        state.invincible = False
+
+    # --------------------------------------
+    # SHIP COLLISIONS (meteor, planet, UFO) — pixel accurate
+    # --------------------------------------
+    if state.invincible:
+        return
+
+    ship = masks["ship"]
+    hit = None
+    n = meteors.n
+    if mask_hit_any(px, py, ship, meteors.x[:n], meteors.y[:n],
+                    METEOR_SIZE[0], METEOR_SIZE[1], masks["meteor"]):
+        hit = "meteor"
+    if not hit:
+        n = planets.n
+        pw, ph = planet_sizes(planets)
+        planet_masks = [masks["planets"][k] for k in planets.aux[:n].astype(np.intp).tolist()]
+        if mask_hit_any(px, py, ship, planets.x[:n], planets.y[:n], pw, ph, planet_masks):
+            hit = "planet"
+    if not hit:
+        n = enemies.n
+        if mask_hit_any(px, py, ship, enemies.x[:n], enemies.y[:n],
+                        UFO_SIZE[0], UFO_SIZE[1], masks["ufo"]):
+            hit = "ufo"
+
+    if hit:
+        state.lives -= 1
+        state.deaths.append(hit)
+        if events is not None:
+            events.append((now, "life_lost", hit, px, py))
+        start_life_lost_pause(state)
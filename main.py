@@ -1,13 +1,46 @@
-import pygame
+import gc
+import logging
+import os
 import random
-from settings import WIDTH, HEIGHT, FPS
-from db import init_db, update_stats, get_high_scores
+import sqlite3
+import time
 
-pygame.init()
-WIN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("SPACE ATTACK")
+import pygame
+from settings import (
+    WIDTH, HEIGHT, MENU_FPS, STATS_PER_PAGE, RENDER_MODE, BG_SCROLL_SPEED, BG_PARALLAX,
+    RECORD_REPLAYS, REPLAY_DIR, PROFILE, PROFILE_DUMP, RENDER_FPS, MAX_CATCHUP_STEPS,
+    QUALITY, FULLSCREEN, DISPLAY_SIZE, SCALE_FILTER, TELEMETRY,
+)
+from assets import ASSETS
+from atlas import SpriteAtlas, SpriteBatch
+from background import ScrollingBackground
+from db import init_db, update_stats, get_leaderboard, start_session
+from game import GameState, Inputs, step, snapshot, FRAME_MS, DISTANCE_PER_FRAME
+from profiler import FrameProfiler
+from quality import QualityGovernor
+from renderer import DirtyRects, Viewport
+from replay import Recorder
+from scenes import Scene, Director
+from telemetry import Telemetry
+from textcache import TextCache
+
+log = logging.getLogger(__name__)
+
+# Importing this module has no side effects: the window opens in
+# init_display() and gameplay sprites load on the first game. WIN is
+# always WIDTH x HEIGHT; when the display is another size it is the
+# viewport's logical surface, scaled up as each frame is flushed.
+WIN = None
+viewport = None
 
 clock = pygame.time.Clock()
+dirty = DirtyRects((WIDTH, HEIGHT), enabled=RENDER_MODE == "dirty")
+profiler = FrameProfiler(enabled=PROFILE)
+governor = QualityGovernor(pinned=QUALITY)
+
+# Scene switches fade out and back in over this many milliseconds
+FADE_DURATION = 800
+director = Director(clock, FADE_DURATION)
 
 # ---------------------------------------------------------
 # COLOR PALETTE — PALETTE 2 (Cyan Midnight Blue + Neon Violet)
@@ -19,104 +52,110 @@ BUTTON_CYAN = (0, 150, 255)    # cyan for hover
 WHITE = (255, 255, 255)
 
 # ---------------------------------------------------------
-# LOAD ASSETS
-# ---------------------------------------------------------
-HOMEPAGE = pygame.image.load("assets/bg.png").convert()
-HOMEPAGE = pygame.transform.scale(HOMEPAGE, (WIDTH, HEIGHT))
-
-BG = pygame.image.load("assets/bg.png").convert()
-
-SHIP = pygame.image.load("assets/ship.png").convert_alpha()
-UFO = pygame.image.load("assets/ufo.png").convert_alpha()
-BULLET = pygame.image.load("assets/bullet.png").convert_alpha()
-
-PLANETS = [
-    pygame.image.load("assets/planet1.png").convert_alpha(),
-    pygame.image.load("assets/planet2.png").convert_alpha(),
-    pygame.image.load("assets/planet3.png").convert_alpha(),
-    pygame.image.load("assets/planet4.png").convert_alpha(),
-]
-
-METEOR = pygame.image.load("assets/meteor.png").convert_alpha()
-EXPLOSION = pygame.image.load("assets/explosion.png").convert_alpha()
-SMALL_EXPL = pygame.image.load("assets/small_explosion.png").convert_alpha()
-
-# ---------------------------------------------------------
-# FONTS
-# ---------------------------------------------------------
-TITLE_FONT = pygame.font.Font("assets/fonts/PressStart2P.ttf", 58)
-BUTTON_FONT = pygame.font.Font("assets/fonts/PressStart2P.ttf", 32)
-STAT_FONT = pygame.font.Font("assets/fonts/PressStart2P.ttf", 24)
-HUD_FONT = pygame.font.Font("assets/fonts/PressStart2P.ttf", 26)
-GAMEOVER_FONT = pygame.font.Font("assets/fonts/PressStart2P.ttf", 72)
-
-# ---------------------------------------------------------
-# SCALE GAME SPRITES 
-# ---------------------------------------------------------
-SHIP = pygame.transform.scale(
-    SHIP, (int(85 * 0.99), int(110 * 0.99))
-)
-
-UFO = pygame.transform.scale(
-    UFO, (int(90 * 1.01), int(60 * 1.01))
-)
-
-BULLET = pygame.transform.scale(BULLET, (7.5, 15))
-METEOR = pygame.transform.scale(METEOR, (90, 90))
+# ASSETS (filled in by init_display / load_gameplay_assets)
+# ---------------------------------------------------------
+HOMEPAGE = None
+FADE = None
+TITLE_FONT = None
+BUTTON_FONT = None
+STAT_FONT = None
+
+background = None
+SHIP = None
+UFO = None
+BULLET = None
+PLANETS = []
+METEOR = None
+EXPLOSION = None
+SMALL_EXPL = None
+HUD_FONT = None
+GAMEOVER_FONT = None
+PROFILE_FONT = None
+sprite_batch = None
+
+text_cache = TextCache(256)
+
+
+def init_display():
+    """Open the window and load what the menus need"""
+    global WIN, viewport, HOMEPAGE, FADE, TITLE_FONT, BUTTON_FONT, STAT_FONT
+
+    pygame.init()
+    if FULLSCREEN or DISPLAY_SIZE:
+        # (0, 0) opens at the desktop's native resolution
+        display = pygame.display.set_mode(DISPLAY_SIZE or (0, 0), pygame.FULLSCREEN if FULLSCREEN else 0)
+        viewport = Viewport(display, (WIDTH, HEIGHT), SCALE_FILTER)
+        WIN = viewport.surface
+        dirty.output = viewport
+    else:
+        WIN = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("SPACE ATTACK")
+
+    HOMEPAGE = ASSETS.image("bg.png", (WIDTH, HEIGHT), alpha=False)
+    FADE = pygame.Surface((WIDTH, HEIGHT))
+    FADE.fill((0, 0, 0))
+
+    TITLE_FONT = ASSETS.font(58)
+    BUTTON_FONT = ASSETS.font(32)
+    STAT_FONT = ASSETS.font(24)
+
+
+def load_gameplay_assets():
+    """Sprites and fonts only the game itself uses, loaded on first play"""
+    global background, SHIP, UFO, BULLET, PLANETS, METEOR, EXPLOSION, SMALL_EXPL
+    global HUD_FONT, GAMEOVER_FONT, PROFILE_FONT, sprite_batch
+
+    if SHIP is not None:
+        return
 
-PLANETS = [
-    pygame.transform.scale(PLANETS[0], (int(150 * 0.99), int(150 * 0.99))),
-    pygame.transform.scale(PLANETS[1], (int(160 * 0.99), int(160 * 0.99))),
-    pygame.transform.scale(PLANETS[2], (int(130 * 1.18), int(130 * 1.18))),
-    pygame.transform.scale(PLANETS[3], (int(150 * 0.99), int(150 * 0.99))),
-]
+    # Scaled to the window width once, keeping its aspect ratio
+    bg_w, bg_h = ASSETS.surface("bg.png").get_size()
+    background = ScrollingBackground(
+        ASSETS.image("bg.png", (WIDTH, round(bg_h * WIDTH / bg_w)), alpha=False), (WIDTH, HEIGHT)
+    )
+
+    SHIP = ASSETS.sprite("ship")
+    UFO = ASSETS.sprite("ufo")
+    BULLET = ASSETS.sprite("bullet")
+    PLANETS = [ASSETS.sprite(f"planet{k}") for k in range(1, 5)]
+    METEOR = ASSETS.sprite("meteor")
+    EXPLOSION = ASSETS.sprite("explosion")
+    SMALL_EXPL = ASSETS.sprite("small_explosion")
+
+    HUD_FONT = ASSETS.font(26)
+    GAMEOVER_FONT = ASSETS.font(72)
+    PROFILE_FONT = ASSETS.font(10)
+
+    atlas = SpriteAtlas({
+        name: ASSETS.sprite(name)
+        for name in ("ship", "ufo", "bullet", "meteor", "small_explosion",
+                     "planet1", "planet2", "planet3", "planet4")
+    })
+    sprite_batch = SpriteBatch(atlas)
+
+    # Assets, caches and modules live for the whole session. Collect
+    # once now, before the first game, and move the survivors out of
+    # the collector's generations so any collection during play only
+    # scans objects made since. Only once: freezing at every new game
+    # would also pin whatever the previous runs left behind.
+    gc.collect()
+    gc.freeze()
 
-EXPLOSION = pygame.transform.scale(EXPLOSION, (150, 150))
-SMALL_EXPL = pygame.transform.scale(SMALL_EXPL, (80, 80))
 
 # ---------------------------------------------------------
 # GAME STATE VARIABLES
 # ---------------------------------------------------------
 scroll_y = 0
-distance_traveled = 0
 
-bullets = []
-enemies = []
-planets = []
-meteors = []
-small_explosions = []
-
-ship_explosion = None
-score = 0
-kills = 0
-lives = 3
-
-paused = False
-pause_start = 0
-invincible = False
-inv_timer = 0
-
-# used to avoid planet repetitions
-last_planet_used = None
-
-# ---------------------------------------------------------
-# FADE SETTINGS
 # ---------------------------------------------------------
-FADE_DURATION = 800
+# MOUSE (display coordinates -> WIN coordinates)
 # ---------------------------------------------------------
-# FADE FUNCTION (Smooth screen fade)
-# ---------------------------------------------------------
-def fade_screen():
-    fade_surface = pygame.Surface((WIDTH, HEIGHT))
-    fade_surface.fill((0, 0, 0))
+def to_logical(pos):
+    return viewport.to_logical(pos) if viewport else pos
 
-    step = int(255 / (FADE_DURATION / 16))
 
-    for alpha in range(0, 255, step):
-        fade_surface.set_alpha(alpha)
-        WIN.blit(fade_surface, (0, 0))
-        pygame.display.update()
-        pygame.time.delay(16)
+def mouse_pos():
+    return to_logical(pygame.mouse.get_pos())
 
 
 # ---------------------------------------------------------
@@ -130,512 +169,456 @@ class Button:
         self.center_x = center_x if center_x else WIDTH // 2
         self.hovered = False
 
-    def draw(self):
-        mx, my = pygame.mouse.get_pos()
-        base_surface = self.font.render(self.text, True, WHITE)
-        w, h = base_surface.get_size()
+    def get_rect(self):
+        w, h = text_cache.render(self.font, self.text, WHITE).get_size()
+        return pygame.Rect(self.center_x - w // 2, self.y, w, h)
 
-        rect = pygame.Rect(self.center_x - w // 2, self.y, w, h)
+    def draw(self):
+        mx, my = mouse_pos()
+        rect = self.get_rect()
         self.hovered = rect.collidepoint(mx, my)
 
-        # Hover outline glow (light neon cyan)
-        if self.hovered:
-            offsets = [
-                (-2, 0), (2, 0),
-                (0, -2), (0, 2),
-                (-2, -2), (2, -2),
-                (-2, 2), (2, 2)
-            ]
-            for ox, oy in offsets:
-                glow = self.font.render(self.text, True, BUTTON_CYAN)
-                WIN.blit(glow, (self.center_x - w // 2 + ox, self.y + oy))
-
-        WIN.blit(base_surface, (self.center_x - w // 2, self.y))
+        # Hover outline glow (light neon cyan), pre-baked with the label
+        if self.hovered and governor.tier.glow:
+            glow, (dx, dy) = text_cache.glow(self.font, self.text, WHITE, BUTTON_CYAN)
+            WIN.blit(glow, (rect.x + dx, rect.y + dy))
+        else:
+            WIN.blit(text_cache.render(self.font, self.text, WHITE), rect)
         return rect
 
 
 # ---------------------------------------------------------
-# PLANET NON-OVERLAP CHECK
+# MENU VIEW — cached static layer + frame cap
 # ---------------------------------------------------------
-def can_place_planet(new_x, new_y, sprite):
-    nw, nh = sprite.get_width(), sprite.get_height()
-    new_rect = pygame.Rect(new_x, new_y, nw, nh)
+class MenuView:
+    """Background, titles and text rows are composed once into one
+    surface; a frame is only drawn when the button hover state
+    changes, invalidate() is called or the director forces it."""
 
-    for px, py, spr in planets:
-        pw, ph = spr.get_width(), spr.get_height()
-        p_rect = pygame.Rect(px, py, pw, ph)
+    def __init__(self, buttons, draw_static):
+        self.buttons = buttons
+        self.rects = [b.get_rect() for b in buttons]
+        self.set_static(draw_static)
 
-        # No overlap allowed
-        if new_rect.colliderect(p_rect):
-            return False
+    def set_static(self, draw_static):
+        """(Re)build the static layer, e.g. when the data shown changes"""
+        self.static = HOMEPAGE.copy()
+        draw_static(self.static)
+        self.hover = None
 
-        # No too-close stacking
-        if abs(new_x - px) < (nw // 2 + pw // 2 + 100) and abs(new_y - py) < (nh // 2 + ph // 2 + 100):
-            return False
+    def invalidate(self):
+        self.hover = None
 
-    return True
+    def clicked(self, event):
+        """Index of the button a left click landed on, or None"""
+        if event.type != pygame.MOUSEBUTTONDOWN or event.button != 1:
+            return None
+        for k, rect in enumerate(self.rects):
+            if rect.collidepoint(to_logical(event.pos)):
+                return k
+        return None
 
+    def draw(self, force=False):
+        mx, my = mouse_pos()
+        hover = tuple(r.collidepoint(mx, my) for r in self.rects)
 
-# ---------------------------------------------------------
-# UFO COLLISION CHECK
-# ---------------------------------------------------------
-def ufo_collides_planet(x, y):
-    rect = pygame.Rect(x, y, UFO.get_width(), UFO.get_height())
-    for p in planets:
-        if rect.colliderect(pygame.Rect(p[0], p[1], p[2].get_width(), p[2].get_height())):
-            return True
-    return False
+        if force or hover != self.hover:
+            dirty.begin("menu")
+            dirty.mark_full()
+            WIN.blit(self.static, (0, 0))
+            for b in self.buttons:
+                b.draw()
+            present()
+            self.hover = hover
 
 
-# ---------------------------------------------------------
-# LIFE LOST PAUSE SCREEN
-# ---------------------------------------------------------
-def start_life_lost_pause(px, py):
-    global paused, pause_start, ship_explosion, invincible, inv_timer
-    global enemies, meteors, bullets, planets
-
-    paused = True
-    pause_start = pygame.time.get_ticks()
-    ship_explosion = (px - 30, py - 30)
+class MenuScene(Scene):
+    """A MenuView driven by the director at MENU_FPS"""
 
-    invincible = True
-    inv_timer = pygame.time.get_ticks()
+    fps = MENU_FPS
 
-    enemies = []
-    meteors = []
-    bullets = []
+    def enter(self):
+        self.view.invalidate()
 
-    clean_planets = []
-    ship_rect = pygame.Rect(px, py, SHIP.get_width(), SHIP.get_height())
+    def draw(self, force):
+        self.view.draw(force)
 
-    for p in planets:
-        if not ship_rect.colliderect(pygame.Rect(p[0], p[1], p[2].get_width(), p[2].get_height())):
-            clean_planets.append(p)
 
-    planets = clean_planets
+# ---------------------------------------------------------
+# CENTERED NEON TITLE WITH DROP SHADOW
+# ---------------------------------------------------------
+def draw_title(surf, font, text, y, shadow_offset):
+    title = text_cache.render(font, text, NEON_VIOLET)
+    layered, (dx, dy) = text_cache.shadow(
+        font, text, NEON_VIOLET, SHADOW_GLOW, (shadow_offset, shadow_offset)
+    )
+    surf.blit(layered, (WIDTH // 2 - title.get_width() // 2 + dx, y + dy))
 
 
-def update_pause(px, py):
-    global paused
-    elapsed = pygame.time.get_ticks() - pause_start
+# ---------------------------------------------------------
+# LIFE LOST PAUSE SCREEN
+# ---------------------------------------------------------
+def draw_pause(state):
+    dirty.begin("pause")
+    if dirty.full:
+        WIN.fill((0, 0, 0))
+    else:
+        dirty.restore(WIN, lambda surf: surf.fill((0, 0, 0)))
 
-    if elapsed >= 1200:
-        paused = False
-        return
+    if state.ship_explosion:
+        dirty.add(WIN.blit(EXPLOSION, state.ship_explosion))
 
-    WIN.fill((0, 0, 0))
+    if not governor.tier.blink or (int(state.now) // 150) % 2 == 0:
+        dirty.add(WIN.blit(SHIP, (state.px, state.py)))
 
-    if ship_explosion:
-        WIN.blit(EXPLOSION, ship_explosion)
+    txt = text_cache.render(GAMEOVER_FONT, "LIFE LOST!", (255, 50, 50))
+    dirty.add(WIN.blit(txt, (WIDTH // 2 - txt.get_width() // 2, HEIGHT // 2 - 100)))
 
-    if (pygame.time.get_ticks() // 150) % 2 == 0:
-        WIN.blit(SHIP, (px, py))
+    present()
 
-    txt = GAMEOVER_FONT.render("LIFE LOST!", True, (255, 50, 50))
-    WIN.blit(txt, (WIDTH // 2 - txt.get_width() // 2, HEIGHT // 2 - 100))
 
-    pygame.display.update()
+# ---------------------------------------------------------
+# END OF A GAME FRAME (profiler overlay + display update)
+# ---------------------------------------------------------
+def present():
+    if profiler.overlay:
+        panel = dirty.add(WIN.blit(profiler.overlay_surface(PROFILE_FONT), (10, 50)))
+        tier = text_cache.slot("quality", PROFILE_FONT, f"quality {governor.tier.name}", WHITE)
+        dirty.add(WIN.blit(tier, (14, panel.bottom + 4)))
+    alpha = director.fade_alpha
+    if alpha:
+        FADE.set_alpha(alpha)
+        WIN.blit(FADE, (0, 0))
+        dirty.mark_full()
+    profiler.mark("draw")
+    dirty.flush()
+    profiler.mark("display")
 
 
 # ---------------------------------------------------------
 # HOMEPAGE (with neon glow + fade into game)
 # ---------------------------------------------------------
-def homepage_screen():
-    play_btn = Button("PLAY", 360)
-    stats_btn = Button("VIEW STATS", 450)
-
-    while True:
-        WIN.blit(HOMEPAGE, (0, 0))
-        shadow = TITLE_FONT.render("SPACE ATTACK", True, SHADOW_GLOW)
-        WIN.blit(shadow, (WIDTH // 2 - shadow.get_width() // 2 + 3, 130 + 3))
-        title = TITLE_FONT.render("SPACE ATTACK", True, NEON_VIOLET)
-        WIN.blit(title, (WIDTH // 2 - title.get_width() // 2, 130))
-
-        play_rect = play_btn.draw()
-        stats_rect = stats_btn.draw()
+class HomeScene(MenuScene):
+    def __init__(self):
+        self.view = MenuView(
+            [Button("PLAY", 360), Button("VIEW STATS", 450)],
+            lambda surf: draw_title(surf, TITLE_FONT, "SPACE ATTACK", 130, 3),
+        )
 
-        pygame.display.update()
-        for e in pygame.event.get():
-            if e.type == pygame.QUIT:
-                pygame.quit(); exit()
-            if e.type == pygame.MOUSEBUTTONDOWN:
-                mx, my = pygame.mouse.get_pos()
-                if play_rect.collidepoint(mx, my):
-                    fade_screen()
-                    return
-                if stats_rect.collidepoint(mx, my):
-                    stats_screen()
+    def handle(self, e):
+        button = self.view.clicked(e)
+        if button == 0:
+            director.switch(GameScene(), fade=True)
+        elif button == 1:
+            director.switch(StatsScene(self))
 
 
 # ---------------------------------------------------------
 # STATS SCREEN (neon cyan + violet)
 # ---------------------------------------------------------
-def stats_screen():
-    back_btn = Button("BACK", 40, center_x=130)
-    scores = get_high_scores()
-    while True:
-        WIN.blit(HOMEPAGE, (0, 0))
-        shadow = TITLE_FONT.render("HIGH SCORES", True, SHADOW_GLOW)
-        WIN.blit(shadow, (WIDTH // 2 - shadow.get_width() // 2 + 3, 96 + 3))
-        header = TITLE_FONT.render("HIGH SCORES", True, NEON_VIOLET)
-        WIN.blit(header, (WIDTH // 2 - header.get_width() // 2, 96))
+class StatsScene(MenuScene):
+    def __init__(self, back):
+        self.back = back
+
+        # Pages come from the leaderboard's in-memory top-N, so turning
+        # a page only rebuilds the static layer
+        self.board = get_leaderboard()
+        self.pages = self.board.page_count(STATS_PER_PAGE)
+        self.page = 0
+
+        buttons = [Button("BACK", 40, center_x=130)]
+        if self.pages > 1:
+            buttons += [Button("PREV", 540, center_x=130), Button("NEXT", 540, center_x=WIDTH - 130)]
+        self.view = MenuView(buttons, self.draw_static)
+
+    def draw_static(self, surf):
+        draw_title(surf, TITLE_FONT, "HIGH SCORES", 96, 3)
+        scores = self.board.page(self.page, STATS_PER_PAGE)
         y = 210
         if scores:
-            for s, k in scores[:10]:
-                row = STAT_FONT.render(f"SCORE {s}     KILLS {k}", True, CYAN_BLUE)
-                WIN.blit(row, (WIDTH // 2 - row.get_width() // 2, y))
+            for s, k in scores:
+                row = text_cache.render(STAT_FONT, f"SCORE {s}     KILLS {k}", CYAN_BLUE)
+                surf.blit(row, (WIDTH // 2 - row.get_width() // 2, y))
                 y += 45
+            if self.pages > 1:
+                pager = text_cache.render(STAT_FONT, f"{self.page + 1}/{self.pages}", CYAN_BLUE)
+                surf.blit(pager, (WIDTH // 2 - pager.get_width() // 2, 544))
         else:
-            msg = STAT_FONT.render("NO DATA FOUND", True, CYAN_BLUE)
-            WIN.blit(msg, (WIDTH // 2 - msg.get_width() // 2, 330))
-        back_rect = back_btn.draw()
-        pygame.display.update()
-        for e in pygame.event.get():
-            if e.type == pygame.QUIT:
-                pygame.quit(); exit()
-            if e.type == pygame.MOUSEBUTTONDOWN:
-                mx, my = pygame.mouse.get_pos()
-                if back_rect.collidepoint(mx, my):
-                    return
+            msg = text_cache.render(STAT_FONT, "NO DATA FOUND", CYAN_BLUE)
+            surf.blit(msg, (WIDTH // 2 - msg.get_width() // 2, 330))
+
+    def turn(self, delta):
+        page = max(0, min(self.pages - 1, self.page + delta))
+        if page != self.page:
+            self.page = page
+            self.view.set_static(self.draw_static)
+
+    def handle(self, e):
+        if e.type == pygame.MOUSEWHEEL:
+            self.turn(-e.y)
+        if e.type == pygame.KEYDOWN:
+            if e.key in (pygame.K_LEFT, pygame.K_PAGEUP):
+                self.turn(-1)
+            if e.key in (pygame.K_RIGHT, pygame.K_PAGEDOWN):
+                self.turn(1)
+
+        button = self.view.clicked(e)
+        if button == 0:
+            director.switch(self.back)
+        elif button == 1:
+            self.turn(-1)
+        elif button == 2:
+            self.turn(1)
+
+
 # ---------------------------------------------------------
 # DRAW GAME WINDOW (HUD + scrolling background)
 # ---------------------------------------------------------
-def draw_window(px, py):
+def draw_window(state, alpha=1.0):
+    """Draw the game `alpha` of the way from the previous step to the current one"""
     global scroll_y
 
-    scroll_y += 2
-    if scroll_y >= BG.get_height():
-        scroll_y = 0
+    tier = governor.tier
+    if dirty.scene != "game":
+        # A menu, the pause screen or a reset drew over the last frame
+        background.invalidate()
+    dirty.begin("game")
 
-    # Background loop
-    WIN.blit(BG, (0, scroll_y - BG.get_height()))
-    WIN.blit(BG, (0, scroll_y))
+    # The background follows distance travelled, so it scrolls at the
+    # same speed whatever the render rate. Lower quality tiers only
+    # move it every few frames.
+    if BG_SCROLL_SPEED and governor.frames % tier.bg_every == 0:
+        frames = state.distance_traveled / DISTANCE_PER_FRAME - (1 - alpha)
+        scroll_y = background.wrap(frames * BG_SCROLL_SPEED * BG_PARALLAX)
 
-    # Planets
-    for p in planets:
-        WIN.blit(p[2], (p[0], p[1]))
+    # Shift last frame in place and repaint the exposed rows and what
+    # sprites covered. Moving it changes every pixel, so the frame
+    # goes out as a full update.
+    if background.draw(WIN, scroll_y, dirty.previous):
+        dirty.mark_full()
 
-    # Meteors
-    for m in meteors:
-        WIN.blit(METEOR, (m[0], m[1]))
+    # Sprites are queued per layer and drawn with one blits() call
+    batch = sprite_batch
 
-    # UFOs
-    for e in enemies:
-        WIN.blit(UFO, (e[0], e[1]))
-
-    # Bullets
-    for b in bullets:
-        WIN.blit(BULLET, (b[0], b[1]))
-
-    # Explosions
-    for ex in small_explosions:
-        WIN.blit(SMALL_EXPL, (ex[0], ex[1]))
+    # Planets
+    for x, y, idx in state.planets.rows(alpha):
+        batch.add(f"planet{int(idx) + 1}", (x, y))
+
+    # Meteors, UFOs, bullets, explosions
+    batch.add_many("meteor", *state.meteors.positions(alpha))
+    batch.add_many("ufo", *state.enemies.positions(alpha))
+    batch.add_many("bullet", *state.bullets.positions(alpha))
+    xs, ys = state.small_explosions.positions(alpha)
+    if tier.max_explosions is not None:
+        xs, ys = xs[:tier.max_explosions], ys[:tier.max_explosions]
+    batch.add_many("small_explosion", xs, ys)
 
     # Ship blink when invincible
-    if not invincible or (pygame.time.get_ticks() // 150) % 2 == 0:
-        WIN.blit(SHIP, (px, py))
-
-    # HUD (cyan and purple)
-    score_txt = HUD_FONT.render(f"SCORE: {score}", True, CYAN_BLUE)
-    lives_txt = HUD_FONT.render(f"LIVES: {lives}", True, NEON_VIOLET)
-
-    WIN.blit(score_txt, (10, 10))
-    WIN.blit(lives_txt, (WIDTH - lives_txt.get_width() - 10, 10))
-
-    pygame.display.update()
-
-
-# ---------------------------------------------------------
-# MAIN GAME LOOP
-# ---------------------------------------------------------
-def main_game():
-    global bullets, enemies, meteors, planets, small_explosions
-    global score, kills, lives, paused, invincible, distance_traveled, last_planet_used
-
-    bullets = []
-    enemies = []
-    meteors = []
-    planets = []
-    small_explosions = []
-    score = 0
-    kills = 0
-    lives = 3
-    paused = False
-    invincible = False
-    distance_traveled = 0
-    last_planet_used = None  # IMPORTANT: prevents planet repeats
-    # Ship position
-    px = WIDTH // 2 - SHIP.get_width() // 2
-    py = HEIGHT - 150
-    enemy_timer = 0
-    meteor_timer = 0
-    UFO_AVOID_COOLDOWN = 300
-    ufo_avoid_timer = 0
-
-    # -------------------------------
-    # GAME LOOP
-    # -------------------------------
-    while True:
-        clock.tick(FPS)
-        now = pygame.time.get_ticks()
-
-        # QUIT EVENT
-        for ev in pygame.event.get():
-            if ev.type == pygame.QUIT:
-                update_stats(score, kills)
-                return
-
-        # --------------------------------------
-        # PAUSE AFTER LIFE LOST
-        # --------------------------------------
-        if paused:
-            update_pause(px, py)
-
-            if not paused:
-                if lives <= 0:
-                    fade_screen()
-                    update_stats(score, kills)
-                    result = game_over_screen(score, kills)
-                    if result == "RESTART":
-                        return "RESTART"
-                    return
-            continue
-
-        # --------------------------------------
-        # SHIP MOVEMENT
-        # --------------------------------------
-        keys = pygame.key.get_pressed()
-
-        if keys[pygame.K_LEFT] and px > 0:
-            px -= 5
-        if keys[pygame.K_RIGHT] and px < WIDTH - SHIP.get_width():
-            px += 5
+    if not state.invincible or not tier.blink or (int(state.now) // 150) % 2 == 0:
+        (x0, y0), x1, y1 = state.prev_ship, state.px, state.py
+        batch.add("ship", (x0 + (x1 - x0) * alpha, y0 + (y1 - y0) * alpha))
 
-        # Smooth bullet fire
-        if keys[pygame.K_SPACE] and len(bullets) < 9:
-            bullets.append([px + SHIP.get_width() // 2 - 4, py - 12])
+    # The rects are needed even in full render mode: the background
+    # repaints under them next frame
+    dirty.add_blits(batch.commands)
+    batch.submit(WIN)
 
-        # --------------------------------------
-        # BULLET MOVEMENT
-        # --------------------------------------
-        for b in bullets[:]:
-            b[1] -= 12
-            if b[1] < -40:
-                bullets.remove(b)
-
-        # --------------------------------------
-        # DISTANCE FOR SPAWN TIMING
-        # --------------------------------------
-        distance_traveled += 2
-
-        # ====================================================
-        # PLANET SPAWN — FIXED: NO REPEATING PLANETS
-        # ====================================================
-        if distance_traveled % random.randint(900, 1600) < 5:
-
-            # Choose planet NOT equal to previous one
-            available = [p for p in PLANETS if p != last_planet_used]
-
-            if available:
-                sprite = random.choice(available)
-            else:
-                sprite = random.choice(PLANETS)
-
-            last_planet_used = sprite  # store last used planet
+    # HUD (cyan and purple)
+    score_txt = text_cache.slot("score", HUD_FONT, f"SCORE: {state.score}", CYAN_BLUE)
+    lives_txt = text_cache.slot("lives", HUD_FONT, f"LIVES: {state.lives}", NEON_VIOLET)
 
-            # Place without overlap
-            for i in range(25):
-                x = random.randint(80, WIDTH - sprite.get_width() - 80)
-                y = random.randint(-350, -200)
+    dirty.add(WIN.blit(score_txt, (10, 10)))
+    dirty.add(WIN.blit(lives_txt, (WIDTH - lives_txt.get_width() - 10, 10)))
 
-                if can_place_planet(x, y, sprite):
-                    planets.append([x, y, sprite])
-                    break
+    present()
 
-        # Move planets
-        for p in planets[:]:
-            p[1] += 2
-            if p[1] > HEIGHT + 260:
-                planets.remove(p)
 
-        # --------------------------------------
-        # UFO SPAWN + MOVEMENT
-        # --------------------------------------
-        enemy_timer += 1
-        if enemy_timer > 135:
-            enemies.append([random.randint(60, WIDTH - 100), -80, 0])
-            enemy_timer = 0
-
-        for e in enemies[:]:
-            ex, ey, drift = e
-
-            # Smooth chase
-            if ex < px - 15: ex += 1.5
-            elif ex > px + 15: ex -= 1.5
-            else: ex += (px - ex) * 0.03
-
-            # Avoid planets
-            if now - ufo_avoid_timer < UFO_AVOID_COOLDOWN:
-                ex += drift * 1.25
-            else:
-                if ufo_collides_planet(ex, ey):
-                    drift = 1 if random.random() < 0.5 else -1
-                    ufo_avoid_timer = now
-
-            # Clamp
-            ex = max(40, min(WIDTH - 140, ex))
-            ey += 2
-
-            # Remove if off screen
-            if ey > HEIGHT:
-                enemies.remove(e)
-                continue
-
-            e[0], e[1], e[2] = ex, ey, drift
-
-            # Bullet hits UFO
-            ufo_rect = pygame.Rect(ex, ey, UFO.get_width(), UFO.get_height())
-            for b in bullets[:]:
-                if ufo_rect.colliderect(pygame.Rect(b[0], b[1], 10, 20)):
-                    small_explosions.append([ex, ey, now])
-                    enemies.remove(e)
-                    bullets.remove(b)
-                    score += 20
-                    kills += 1
-                    break
-
-        # Remove explosion sprites
-        for ex in small_explosions[:]:
-            if now - ex[2] > 240:
-                small_explosions.remove(ex)
+# ---------------------------------------------------------
+# KEYBOARD -> SIMULATION INPUTS
+# ---------------------------------------------------------
+def read_inputs():
+    keys = pygame.key.get_pressed()
+    return Inputs(keys[pygame.K_LEFT], keys[pygame.K_RIGHT], keys[pygame.K_SPACE])
 
-        # --------------------------------------
-        # METEOR SPAWN (TOP RIGHT ONLY)
-        # --------------------------------------
-        meteor_timer += 1
-        if meteor_timer > 240:
-            meteors.append([WIDTH + 50, random.randint(-120, -40)])
-            meteor_timer = 0
-
-        for m in meteors[:]:
-            m[0] -= 2.7
-            m[1] += 3.2
-            if m[1] > HEIGHT + 150:
-                meteors.remove(m)
-
-        # Bullet hits meteor
-        for m in meteors[:]:
-            meteor_rect = pygame.Rect(m[0], m[1], 70, 70)
-            for b in bullets[:]:
-                if meteor_rect.colliderect(pygame.Rect(b[0], b[1], 10, 20)):
-                    meteors.remove(m)
-                    bullets.remove(b)
-                    score += 10
-                    small_explosions.append([m[0], m[1], now])
-                    break
 
-        # --------------------------------------
-        # INVINCIBILITY TIMEOUT
-        # --------------------------------------
-        if invincible and now - inv_timer > 1500:
-            invincible = False
+# ---------------------------------------------------------
+# GAME SCENE (thin driver around game.step)
+# ---------------------------------------------------------
+def save_replay(recorder, state):
+    if recorder is None:
+        return
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{recorder.recording.seed}.rpl"
+    try:
+        recorder.finish(state, os.path.join(REPLAY_DIR, name))
+    except OSError:
+        # Losing a recording is not worth interrupting the game
+        pass
+
+
+def dump_profile():
+    if PROFILE_DUMP and profiler.count:
+        profiler.dump(PROFILE_DUMP)
+
+
+def start_telemetry(state, seed):
+    if not TELEMETRY:
+        return None
+    try:
+        telemetry = Telemetry(start_session(seed))
+    except sqlite3.Error as exc:
+        # The game runs fine without it
+        log.warning("telemetry off for this game: %s", exc)
+        return None
+    telemetry.attach(state)
+    return telemetry
+
+
+class GameScene(Scene):
+    """One run: fixed-step simulation, interpolated drawing"""
+
+    fps = RENDER_FPS
+
+    def __init__(self, seed=None):
+        load_gameplay_assets()
+
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.state = GameState(seed)
+        self.recorder = Recorder(seed) if RECORD_REPLAYS else None
+        self.telemetry = start_telemetry(self.state, seed)
+        self.finished = False
+
+        # Real time goes into an accumulator that is spent in fixed
+        # FRAME_MS simulation steps, so the render rate never changes
+        # the game speed. The first frame runs one step straight away.
+        self.accumulator = FRAME_MS
+
+    def enter(self):
+        dirty.reset()
+        governor.reset()
+
+    def handle(self, ev):
+        if ev.type == pygame.KEYDOWN and ev.key == pygame.K_F3:
+            profiler.toggle_overlay()
+            dirty.mark_full()
+
+    def finish(self):
+        """Record the run once, whether it ended or the window closed"""
+        if self.finished:
+            return
+        self.finished = True
+        state = self.state
+        save_replay(self.recorder, state)
+        dump_profile()
+        if self.telemetry is not None:
+            self.telemetry.close(state)
+        update_stats(state.score, state.kills)
+
+    def quit(self):
+        self.finish()
+
+    def update(self, dt):
+        profiler.begin_frame()
+        governor.begin_frame()
+        state = self.state
+        if state.game_over:
+            return
+        if self.telemetry is not None:
+            # Last frame's time, counted inside this frame so any
+            # hand-off to the writer shows up in the measurements
+            self.telemetry.frame(state, governor.frame_ms, governor.tier.name)
+        self.accumulator += dt
+
+        # Simulation time counts steps, not wall-clock ticks, so the
+        # seed and the recorded keys are enough to replay the run
+        state.profiler = profiler if profiler.enabled else None
+        steps = 0
+        while self.accumulator >= FRAME_MS and not state.game_over:
+            if steps == MAX_CATCHUP_STEPS:
+                # Too far behind (a stall or a very slow machine): slow
+                # the game down rather than spiral into more catch-up
+                self.accumulator = 0
+                break
+            inputs = read_inputs()
+            if self.recorder is not None:
+                self.recorder.record(inputs)
+            profiler.mark("input")
+
+            snapshot(state)
+            step(state, inputs)
+            profiler.mark("collisions")
+            self.accumulator -= FRAME_MS
+            steps += 1
+
+        if state.game_over:
+            self.finish()
+            director.switch(GameOverScene(state.score, state.kills), fade=True)
+
+    def draw(self, force):
+        # Tiers that hold the background still between scrolls repaint
+        # only what changed on the frames in between, even in full
+        # render mode
+        use_dirty = RENDER_MODE == "dirty" or governor.tier.bg_every > 1
+        if use_dirty != dirty.enabled:
+            dirty.enabled = use_dirty
+            force = True
+        if force:
+            dirty.mark_full()
+            background.invalidate()
 
         # --------------------------------------
-        # SHIP COLLISIONS
+        # PAUSE AFTER LIFE LOST
         # --------------------------------------
-        ship_rect = pygame.Rect(px, py, SHIP.get_width(), SHIP.get_height())
-
-        # Meteor collision
-        for m in meteors:
-            if ship_rect.colliderect(pygame.Rect(m[0], m[1], 70, 70)) and not invincible:
-                lives -= 1
-                start_life_lost_pause(px, py)
-                break
-
-        # Planet collision
-        for p in planets:
-            if ship_rect.colliderect(pygame.Rect(p[0], p[1], p[2].get_width(), p[2].get_height())) and not invincible:
-                lives -= 1
-                start_life_lost_pause(px, py)
-                break
+        if self.state.paused:
+            draw_pause(self.state)
+        else:
+            # --------------------------------------
+            # DRAW EVERYTHING (between the last two steps)
+            # --------------------------------------
+            draw_window(self.state, min(1.0, self.accumulator / FRAME_MS))
+        profiler.end_frame()
+        governor.end_frame()
 
-        # UFO collision
-        for ex, ey, drift in enemies:
-            if ship_rect.colliderect(pygame.Rect(ex, ey, UFO.get_width(), UFO.get_height())) and not invincible:
-                lives -= 1
-                start_life_lost_pause(px, py)
-                break
 
-        # --------------------------------------
-        # DRAW EVERYTHING
-        # --------------------------------------
-        draw_window(px, py)
 # ---------------------------------------------------------
 # GAME OVER SCREEN (Neon Palette + Fade In)
 # ---------------------------------------------------------
-def game_over_screen(final_score, final_kills):
-
-    playagain_btn = Button("RESTART", 430)
-    end_btn = Button("END", 520)
-
-    # Fade into game over
-    fade_screen()
+class GameOverScene(MenuScene):
+    def __init__(self, final_score, final_kills):
 
-    while True:
-        WIN.blit(HOMEPAGE, (0, 0))
+        def draw_static(surf):
+            # Neon Violet title with its shadow
+            draw_title(surf, GAMEOVER_FONT, "GAME OVER", 138, 4)
 
-        # Shadow behind "GAME OVER"
-        shadow = GAMEOVER_FONT.render("GAME OVER", True, SHADOW_GLOW)
-        WIN.blit(shadow, (
-            WIDTH // 2 - shadow.get_width() // 2 + 4,
-            138 + 4
-        ))
+            # Score (Cyan Blue)
+            score_txt = text_cache.render(HUD_FONT, f"SCORE: {final_score}", CYAN_BLUE)
+            surf.blit(score_txt, (WIDTH // 2 - score_txt.get_width() // 2, 270))
 
-        # Neon Violet title
-        title = GAMEOVER_FONT.render("GAME OVER", True, NEON_VIOLET)
-        WIN.blit(title, (WIDTH // 2 - title.get_width() // 2, 138))
+            # Kills (Neon Violet)
+            kills_txt = text_cache.render(HUD_FONT, f"KILLS: {final_kills}", NEON_VIOLET)
+            surf.blit(kills_txt, (WIDTH // 2 - kills_txt.get_width() // 2, 315))
 
-        # Score (Cyan Blue)
-        score_txt = HUD_FONT.render(f"SCORE: {final_score}", True, CYAN_BLUE)
-        WIN.blit(score_txt, (WIDTH // 2 - score_txt.get_width() // 2, 270))
+        self.view = MenuView([Button("RESTART", 430), Button("END", 520)], draw_static)
 
-        # Kills (Neon Violet)
-        kills_txt = HUD_FONT.render(f"KILLS: {final_kills}", True, NEON_VIOLET)
-        WIN.blit(kills_txt, (WIDTH // 2 - kills_txt.get_width() // 2, 315))
+    def handle(self, ev):
+        button = self.view.clicked(ev)
 
-        # Buttons
-        again_rect = playagain_btn.draw()
-        end_rect = end_btn.draw()
+        # Restart from the homepage
+        if button == 0:
+            director.switch(HomeScene(), fade=True)
 
-        pygame.display.update()
-
-        # EVENTS
-        for ev in pygame.event.get():
-            if ev.type == pygame.QUIT:
-                pygame.quit(); exit()
-
-            if ev.type == pygame.MOUSEBUTTONDOWN:
-                mx, my = pygame.mouse.get_pos()
-
-                # Restart game
-                if again_rect.collidepoint(mx, my):
-                    fade_screen()
-                    return "RESTART"
-
-                # Exit game
-                if end_rect.collidepoint(mx, my):
-                    pygame.quit(); exit()
+        # Exit game
+        elif button == 1:
+            director.stop()
 
 
 # ---------------------------------------------------------
-# MAIN LOOP (Homepage → Game → Restart)
+# MAIN LOOP (Homepage → Game → Game over → Homepage)
 # ---------------------------------------------------------
 if __name__ == "__main__":
+    # Quality tier changes and dropped stats writes are logged
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
     init_db()
-
-    while True:
-        homepage_screen()
-        result = main_game()
-
-        if result == "RESTART":
-            continue
+    init_display()
+    director.run(HomeScene())
+    pygame.quit()
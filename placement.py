@@ -0,0 +1,99 @@
+import math
+
+import numpy as np
+
+from settings import WIDTH, PLANET_SIZES
+
+# ---------------------------------------------------------
+# PLANET PLACEMENT OVER THE SPAWN BAND
+# ---------------------------------------------------------
+# A new planet may not come within CLEARANCE px (measured the way
+# the original check did) of a planet already near the band. For a
+# given y only the planets vertically close to it block anything,
+# and each one blocks a single x-interval. So the band is split at
+# the y's where that set changes, the free x-intervals of every
+# piece are counted, and one random number picks a position
+# uniformly among all free ones. This is exact, its cost depends
+# only on the few planets near the band, and when the count is zero
+# there is provably no room.
+
+SPAWN_X_MARGIN = 80
+SPAWN_Y = (-350, -200)
+CLEARANCE = 100
+
+_W = np.array([w for w, h in PLANET_SIZES])
+_H = np.array([h for w, h in PLANET_SIZES])
+
+# Per (new sprite, existing sprite): the distance below which the
+# two are too close, horizontally and vertically
+H_GAP = (_W[:, None] // 2 + _W[None, :] // 2 + CLEARANCE).tolist()
+V_GAP = (_H[:, None] // 2 + _H[None, :] // 2 + CLEARANCE).tolist()
+
+# Per sprite: the x-range a planet of that width may spawn in
+X_RANGE = [(SPAWN_X_MARGIN, WIDTH - w - SPAWN_X_MARGIN) for w, h in PLANET_SIZES]
+
+
+def _blocked(centre, gap):
+    """Integer range strictly within `gap` of `centre`, inclusive"""
+    return math.floor(centre - gap) + 1, math.ceil(centre + gap) - 1
+
+
+def free_intervals(lo, hi, blocked):
+    """[lo, hi] minus the inclusive ranges in `blocked`, as sorted (a, b) pairs"""
+    free = []
+    for a, b in sorted(blocked):
+        if a > lo:
+            free.append((lo, min(a - 1, hi)))
+        lo = max(lo, b + 1)
+        if lo > hi:
+            return free
+    free.append((lo, hi))
+    return free
+
+
+def place_planet(rng, idx, xs, ys, kinds):
+    """Uniformly random free (x, y) for planet sprite `idx`, or None.
+
+    `xs`, `ys` and `kinds` describe the planets already on the field.
+    """
+    y_lo, y_hi = SPAWN_Y
+    h_gap, v_gap = H_GAP[idx], V_GAP[idx]
+
+    # Occupancy index: planets close to some y in the band, with the
+    # y-range each one blocks and the x-range it blocks there
+    near = []
+    for x, y, k in zip(xs, ys, kinds):
+        ya, yb = _blocked(y, v_gap[k])
+        if ya <= y_hi and yb >= y_lo:
+            near.append((max(ya, y_lo), min(yb, y_hi), _blocked(x, h_gap[k])))
+
+    # Pieces of the band with the same set of blocking planets
+    cuts = {y_lo, y_hi + 1}
+    for ya, yb, _ in near:
+        cuts.update((ya, yb + 1))
+    cuts = sorted(cuts)
+
+    x_lo, x_hi = X_RANGE[idx]
+    pieces = []
+    total = 0
+    for y0, y1 in zip(cuts, cuts[1:]):
+        blocked = [xr for ya, yb, xr in near if ya <= y0 <= yb]
+        free = free_intervals(x_lo, x_hi, blocked)
+        width = sum(b - a + 1 for a, b in free)
+        if width:
+            pieces.append((y0, y1 - y0, free, width))
+            total += (y1 - y0) * width
+
+    if not total:
+        return None
+
+    r = rng.randrange(total)
+    for y0, rows, free, width in pieces:
+        if r < rows * width:
+            y = y0 + r // width
+            r %= width
+            for a, b in free:
+                if r <= b - a:
+                    return a + r, y
+                r -= b - a + 1
+        r -= rows * width
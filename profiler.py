@@ -0,0 +1,132 @@
+import csv
+import json
+import time
+
+import numpy as np
+
+# ---------------------------------------------------------
+# PER-PHASE FRAME PROFILER
+# ---------------------------------------------------------
+# The game loop calls mark(phase) at each phase boundary; the time
+# since the previous mark is added to that phase for the current
+# frame. Phases may be marked several times per frame (spawning
+# happens once per entity kind), the times add up. Finished frames
+# go into a fixed-size ring buffer, so a long session never grows
+# memory. While disabled every method returns straight away.
+
+PHASES = ("input", "movement", "spawn", "collisions", "draw", "display")
+
+# Frames the overlay averages over, and how often it re-renders
+OVERLAY_WINDOW = 60
+OVERLAY_REFRESH = 15
+
+
+class FrameProfiler:
+    def __init__(self, capacity=1800, enabled=False, phases=PHASES):
+        self.enabled = enabled
+        self.overlay = False
+        self.phases = phases
+        self._index = {name: k for k, name in enumerate(phases)}
+
+        # One row per frame: each phase, then the frame total (ms)
+        self.samples = np.zeros((capacity, len(phases) + 1))
+        self.count = 0
+
+        self._row = [0.0] * len(phases)
+        self._start = self._last = 0.0
+        self._overlay_surf = None
+        self._overlay_frame = -OVERLAY_REFRESH
+
+    def toggle_overlay(self):
+        """Show or hide the overlay; showing it also starts recording"""
+        self.overlay = not self.overlay
+        if self.overlay and not self.enabled:
+            # Switched on mid-frame: time this frame from here
+            self.enabled = True
+            self.begin_frame()
+
+    # -----------------------------------------------------
+    # Recording
+    # -----------------------------------------------------
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self._row = [0.0] * len(self.phases)
+        self._start = self._last = time.perf_counter()
+
+    def mark(self, phase):
+        """Charge the time since the last mark to `phase`"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._row[self._index[phase]] += (now - self._last) * 1000
+        self._last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        row = self.samples[self.count % len(self.samples)]
+        row[:-1] = self._row
+        row[-1] = (time.perf_counter() - self._start) * 1000
+        self.count += 1
+
+    def frames(self):
+        """Recorded rows, oldest first"""
+        capacity = len(self.samples)
+        if self.count <= capacity:
+            return self.samples[:self.count]
+        split = self.count % capacity
+        return np.concatenate((self.samples[split:], self.samples[:split]))
+
+    # -----------------------------------------------------
+    # Summary + overlay
+    # -----------------------------------------------------
+    def summary(self, window=OVERLAY_WINDOW):
+        """{phase: (mean ms, max ms)} over the last `window` frames"""
+        recent = self.frames()[-window:]
+        if not len(recent):
+            return {}
+        means, peaks = recent.mean(axis=0), recent.max(axis=0)
+        names = self.phases + ("total",)
+        return {name: (float(means[k]), float(peaks[k])) for k, name in enumerate(names)}
+
+    def overlay_surface(self, font, color=(255, 255, 255), background=(0, 0, 0, 160)):
+        """The overlay panel, re-rendered every OVERLAY_REFRESH frames"""
+        if self.count - self._overlay_frame < OVERLAY_REFRESH and self._overlay_surf is not None:
+            return self._overlay_surf
+        import pygame
+
+        lines = [f"{'PHASE':<10} {'AVG':>6} {'MAX':>6}"]
+        for name, (mean, peak) in self.summary().items():
+            lines.append(f"{name:<10} {mean:6.2f} {peak:6.2f}")
+        rendered = [font.render(line, True, color) for line in lines]
+        line_h = font.get_linesize() + 3
+        width = max(r.get_width() for r in rendered) + 8
+
+        surf = pygame.Surface((width, line_h * len(rendered) + 8), pygame.SRCALPHA)
+        surf.fill(background)
+        for k, r in enumerate(rendered):
+            surf.blit(r, (4, 4 + k * line_h))
+
+        self._overlay_surf = surf
+        self._overlay_frame = self.count
+        return surf
+
+    # -----------------------------------------------------
+    # Export
+    # -----------------------------------------------------
+    def dump(self, path):
+        """Write the buffer to `path` as JSON (.json) or CSV (anything else)"""
+        rows = self.frames().tolist()
+        columns = list(self.phases) + ["total"]
+        first = self.count - len(rows)
+
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump({"columns": columns, "first_frame": first, "ms": rows}, f)
+        else:
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["frame"] + [f"{c}_ms" for c in columns])
+                for k, row in enumerate(rows):
+                    writer.writerow([first + k] + [f"{v:.4f}" for v in row])
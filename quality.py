@@ -0,0 +1,119 @@
+import logging
+import time
+from collections import namedtuple
+
+from settings import FPS
+
+log = logging.getLogger(__name__)
+
+# ---------------------------------------------------------
+# QUALITY TIERS
+# ---------------------------------------------------------
+# Optional polish, from full quality down:
+#   glow            hover glow on menu buttons
+#   bg_every        the background scrolls on every n-th rendered
+#                   frame; frames in between repaint only what the
+#                   sprites covered
+#   blink           the ship flashes while invincible (otherwise it
+#                   is drawn steadily)
+#   max_explosions  small explosions drawn at once (None: all)
+
+Tier = namedtuple("Tier", "name glow bg_every blink max_explosions")
+
+TIERS = (
+    Tier("high", True, 1, True, None),
+    Tier("medium", False, 1, True, 8),
+    Tier("low", False, 2, False, 4),
+    Tier("minimal", False, 4, False, 1),
+)
+
+
+# ---------------------------------------------------------
+# FRAME-BUDGET GOVERNOR
+# ---------------------------------------------------------
+# The game scene brackets each frame's work (simulation steps, draw
+# and display update, not the clock's sleep) with begin_frame() and
+# end_frame(). Every `window` frames the mean is compared with the
+# 1/FPS budget: above `high` of it the tier drops one step at once;
+# below `low` for `recover` windows in a row it climbs one step. An
+# upgrade that is dropped again straight away doubles the windows
+# the next climb waits for, so a machine on the edge of a tier does
+# not flip between two.
+
+
+class QualityGovernor:
+    def __init__(self, budget_ms=1000 / FPS, tiers=TIERS, window=30,
+                 high=0.9, low=0.5, recover=4, pinned=None):
+        self.tiers = tiers
+        self.budget_ms = budget_ms
+        self.window = window
+        self.high_ms = high * budget_ms
+        self.low_ms = low * budget_ms
+        self.recover = recover
+
+        # A pinned tier (by name) switches the governor off
+        self.pinned = pinned
+        self.level = [t.name for t in tiers].index(pinned) if pinned else 0
+
+        self.frames = 0
+        self.frame_ms = 0.0
+        self.last_mean = 0.0
+        self._wait = recover
+        self._good = 0
+        self._just_upgraded = False
+        self._sum = 0.0
+        self._count = 0
+        self._start = None
+
+    @property
+    def tier(self):
+        return self.tiers[self.level]
+
+    def reset(self):
+        """Drop the partial window, e.g. after a scene switch or a load"""
+        self._sum = 0.0
+        self._count = 0
+        self._good = 0
+        self._start = None
+
+    def begin_frame(self):
+        self._start = time.perf_counter()
+
+    def end_frame(self):
+        self.frames += 1
+        if self._start is None:
+            return
+        self.frame_ms = (time.perf_counter() - self._start) * 1000
+        self._sum += self.frame_ms
+        self._count += 1
+        self._start = None
+        if self._count == self.window:
+            self._judge(self._sum / self._count)
+            self._sum = 0.0
+            self._count = 0
+
+    def _judge(self, mean):
+        self.last_mean = mean
+        if self.pinned:
+            return
+        upgraded, self._just_upgraded = self._just_upgraded, False
+
+        if mean > self.high_ms:
+            self._good = 0
+            if upgraded:
+                self._wait = min(self._wait * 2, 64)
+            if self.level < len(self.tiers) - 1:
+                self._set_level(self.level + 1, mean)
+        elif mean < self.low_ms:
+            self._good += 1
+            if self._good >= self._wait and self.level > 0:
+                self._good = 0
+                self._just_upgraded = True
+                self._set_level(self.level - 1, mean)
+        else:
+            self._good = 0
+
+    def _set_level(self, level, mean):
+        log.info("quality %s -> %s (frame work %.1f ms of %.1f ms budget)",
+                 self.tier.name, self.tiers[level].name, mean, self.budget_ms)
+        self.level = level
@@ -0,0 +1,161 @@
+from itertools import islice
+
+import pygame
+
+# ---------------------------------------------------------
+# DIRTY-RECTANGLE TRACKING
+# ---------------------------------------------------------
+# Draw code reports every rect it blits. At the end of the frame
+# only the areas covered last frame (now stale) and this frame are
+# pushed to the display. Anything that changes the whole screen,
+# such as a background scroll or a scene switch, forces a full
+# update instead. Sprite batches report their blits through
+# add_blits(), which fills Rects kept from two frames back rather
+# than allocating one per sprite per frame.
+
+
+class DirtyRects:
+    def __init__(self, size, enabled=True, full_ratio=0.5, output=pygame.display):
+        self.screen_area = size[0] * size[1]
+        self.enabled = enabled
+        # Past this share of the screen one full update is cheaper
+        self.full_ratio = full_ratio
+        # Anything with update() / update(rects), e.g. a Viewport
+        self.output = output
+
+        self.previous = []
+        self.current = []
+        self.full = True
+        self.scene = None
+
+        # Rects for add_blits(): one pool for this frame, one still
+        # listed in `previous`
+        self._pools = ([], [])
+        self._pool = self._pools[0]
+        self._used = 0
+
+    def begin(self, scene):
+        """Start a frame of `scene`; switching scenes repaints everything"""
+        if scene != self.scene or not self.enabled:
+            self.full = True
+        self.scene = scene
+        self.current.clear()
+        self._used = 0
+
+    def reset(self):
+        """Forget the previous frame, e.g. after a menu drew over the window"""
+        self.previous.clear()
+        self.scene = None
+        self.full = True
+
+    def mark_full(self):
+        self.full = True
+
+    def add(self, rect):
+        self.current.append(rect)
+        return rect
+
+    def extend(self, rects):
+        self.current.extend(rects)
+
+    def add_blits(self, commands):
+        """Add the dest rects of Surface.blits() `commands` (unclipped)"""
+        pool, start = self._pool, self._used
+        end = start + len(commands)
+        while len(pool) < end:
+            pool.append(pygame.Rect(0, 0, 0, 0))
+        for rect, (_, (x, y), area) in zip(islice(pool, start, end), commands):
+            rect.update(x, y, area.w, area.h)
+        self.current.extend(islice(pool, start, end))
+        self._used = end
+
+    def restore(self, surface, paint):
+        """Repaint what was under last frame's rects with `paint(surface)`"""
+        for rect in self.previous:
+            surface.set_clip(rect)
+            paint(surface)
+        surface.set_clip(None)
+
+    def flush(self):
+        if self.full:
+            self.output.update()
+        else:
+            rects = self.previous + self.current
+            if sum(r.w * r.h for r in rects) > self.full_ratio * self.screen_area:
+                self.output.update()
+            else:
+                self.output.update(rects)
+
+        # Swap lists and pools: this frame's rects become the stale ones
+        self.previous, self.current = self.current, self.previous
+        self.current.clear()
+        self._pool = self._pools[self._pool is self._pools[0]]
+        self._used = 0
+        self.full = False
+
+
+# ---------------------------------------------------------
+# LOGICAL RENDER TARGET
+# ---------------------------------------------------------
+# Everything is drawn at the logical size the sprites were scaled
+# for; update() scales the frame onto the display in one pass,
+# centred with black bars. "integer" scaling uses the largest whole
+# factor (crisp pixels, and dirty rects scale on their own since a
+# logical pixel maps to an exact block); "smooth" fills the display
+# with smoothscale, which blends across rect edges, so it always
+# scales the whole frame.
+
+
+class Viewport:
+    def __init__(self, display, logical_size, filter="integer"):
+        dw, dh = display.get_size()
+        lw, lh = logical_size
+        scale = min(dw / lw, dh / lh)
+        self.smooth = filter == "smooth"
+        # Only whole factors can scale dirty rects one by one
+        self.per_rect = not self.smooth and scale >= 1
+        self.scale = int(scale) if self.per_rect else scale
+
+        w, h = round(lw * self.scale), round(lh * self.scale)
+        self.rect = pygame.Rect((dw - w) // 2, (dh - h) // 2, w, h)
+        self.display = display
+        self.target = display.subsurface(self.rect)
+        self.surface = pygame.Surface(logical_size, 0, display)
+
+        display.fill((0, 0, 0))
+        self._bars = True
+
+    def to_logical(self, pos):
+        """Display coordinates (e.g. the mouse) to logical ones"""
+        return (int((pos[0] - self.rect.x) / self.scale),
+                int((pos[1] - self.rect.y) / self.scale))
+
+    def _scale_rect(self, rect):
+        k = self.scale
+        x, y = int(rect.x * k), int(rect.y * k)
+        return pygame.Rect(x, y, int(rect.right * k) - x, int(rect.bottom * k) - y)
+
+    def update(self, rects=None):
+        if rects is None or not self.per_rect:
+            if self.smooth:
+                pygame.transform.smoothscale(self.surface, self.rect.size, self.target)
+            else:
+                pygame.transform.scale(self.surface, self.rect.size, self.target)
+            if self._bars:
+                # The black bars only need pushing once
+                pygame.display.update()
+                self._bars = False
+            else:
+                pygame.display.update(self.rect)
+            return
+
+        bounds = self.surface.get_rect()
+        out = []
+        for rect in rects:
+            rect = rect.clip(bounds)
+            if rect:
+                dest = self._scale_rect(rect)
+                pygame.transform.scale(self.surface.subsurface(rect), dest.size,
+                                       self.target.subsurface(dest))
+                out.append(dest.move(self.rect.topleft))
+        pygame.display.update(out)
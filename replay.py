@@ -0,0 +1,218 @@
+"""Record and replay game sessions.
+
+A recording is the run's RNG seed plus the LEFT/RIGHT/SPACE key
+state of every simulation frame. Because the core draws all its
+randomness from the seeded state and keeps time in frames, feeding
+the same keys back through game.step() reproduces the run exactly.
+
+    python replay.py replays/20240101-120000-12345.rpl
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+
+from game import GameState, Inputs, step, RULES_VERSION
+from settings import FPS
+from spawner import WaveError, load_waves, waves_digest
+
+# ---------------------------------------------------------
+# FILE FORMAT
+# ---------------------------------------------------------
+# Header: magic, fps, game rules version, wave timeline hash
+# (spawner.waves_digest), seed, frame count, final score, final
+# kills. Body: run-length encoded key states, one (keys, count) pair
+# per run of identical frames. Keys are a bit field, so an hour of
+# play usually fits in a few kilobytes.
+# Version 2 files have no wave hash, so their timeline is not
+# checked. Version 1 files have no rules field either; they were
+# recorded with rules version 1.
+
+_HEADER = struct.Struct("<8sHHQQIqq")
+_HEADER_V2 = struct.Struct("<8sHHQIqq")
+_HEADER_V1 = struct.Struct("<8sHQIqq")
+_RUN = struct.Struct("<BH")
+_MAGIC = b"SAREPLY3"
+_MAGIC_V2 = b"SAREPLY2"
+_MAGIC_V1 = b"SAREPLY1"
+_MAX_RUN = 0xFFFF
+
+KEY_LEFT = 1
+KEY_RIGHT = 2
+KEY_FIRE = 4
+
+
+class ReplayError(Exception):
+    pass
+
+
+def pack_inputs(inputs):
+    return (KEY_LEFT if inputs.left else 0) | (KEY_RIGHT if inputs.right else 0) | (KEY_FIRE if inputs.fire else 0)
+
+
+def unpack_inputs(keys):
+    return Inputs(bool(keys & KEY_LEFT), bool(keys & KEY_RIGHT), bool(keys & KEY_FIRE))
+
+
+class Recording:
+    """A seed, per-frame key states and the result they produced
+
+    `waves` is the waves_digest() of the timeline it was played on, or
+    None if unknown (files from before it was stored).
+    """
+
+    def __init__(self, seed, runs=None, score=0, kills=0, fps=FPS, rules=RULES_VERSION,
+                 waves=None):
+        self.seed = seed
+        self.runs = runs if runs is not None else []  # [[keys, count]]
+        self.score = score
+        self.kills = kills
+        self.fps = fps
+        self.rules = rules
+        self.waves = waves
+
+    @property
+    def frames(self):
+        return sum(count for _, count in self.runs)
+
+    def inputs(self):
+        """Yield the Inputs of every frame in order"""
+        decoded = {}
+        for keys, count in self.runs:
+            inputs = decoded.get(keys)
+            if inputs is None:
+                inputs = decoded[keys] = unpack_inputs(keys)
+            for _ in range(count):
+                yield inputs
+
+    def save(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self.fps, self.rules, self.waves or 0, self.seed,
+                                 self.frames, self.score, self.kills))
+            f.write(b"".join(_RUN.pack(keys, count) for keys, count in self.runs))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        header = {_MAGIC: _HEADER, _MAGIC_V2: _HEADER_V2, _MAGIC_V1: _HEADER_V1}.get(data[:len(_MAGIC)])
+        if header is None:
+            raise ReplayError(f"{path}: not a replay file")
+        if len(data) < header.size:
+            raise ReplayError(f"{path}: truncated header")
+        waves = None
+        if header is _HEADER:
+            _, fps, rules, waves, seed, frames, score, kills = header.unpack_from(data)
+            waves = waves or None
+        elif header is _HEADER_V2:
+            _, fps, rules, seed, frames, score, kills = header.unpack_from(data)
+        else:
+            _, fps, seed, frames, score, kills = header.unpack_from(data)
+            rules = 1
+        body = memoryview(data)[header.size:]
+        if len(body) % _RUN.size:
+            raise ReplayError(f"{path}: truncated body")
+        runs = [list(run) for run in _RUN.iter_unpack(body)]
+        rec = cls(seed, runs, score, kills, fps, rules, waves)
+        if rec.frames != frames:
+            raise ReplayError(f"{path}: header says {frames} frames, body has {rec.frames}")
+        return rec
+
+
+class Recorder:
+    """Collects one session's key states while it is played
+
+    Pass the same `waves` the session's GameState was built with.
+    """
+
+    def __init__(self, seed, waves=None):
+        self.recording = Recording(seed, waves=waves_digest(waves or load_waves()))
+
+    def record(self, inputs):
+        keys = pack_inputs(inputs)
+        runs = self.recording.runs
+        if runs and runs[-1][0] == keys and runs[-1][1] < _MAX_RUN:
+            runs[-1][1] += 1
+        else:
+            runs.append([keys, 1])
+
+    def finish(self, state, path):
+        """Store the run's result and write the recording to `path`"""
+        self.recording.score = state.score
+        self.recording.kills = state.kills
+        self.recording.save(path)
+        return self.recording
+
+
+# ---------------------------------------------------------
+# HEADLESS REPLAY
+# ---------------------------------------------------------
+def check(recording, waves=None):
+    """Raise ReplayError if this build cannot reproduce the recording"""
+    if recording.fps != FPS:
+        raise ReplayError(f"recorded at {recording.fps} FPS, the game runs at {FPS}")
+    if recording.rules != RULES_VERSION:
+        raise ReplayError(f"recorded with game rules v{recording.rules}, this build runs v{RULES_VERSION}")
+    digest = waves_digest(waves or load_waves())
+    if recording.waves is not None and recording.waves != digest:
+        raise ReplayError(f"recorded on wave timeline {recording.waves:016x}, "
+                          f"these waves are {digest:016x}")
+
+
+def play(recording, waves=None):
+    """Re-run a recording as fast as possible and return the final state"""
+    check(recording, waves)
+    state = GameState(recording.seed, waves)
+    for inputs in recording.inputs():
+        step(state, inputs)
+    return state
+
+
+def verify(recording, waves=None):
+    """Replay and raise ReplayError unless score and kills match"""
+    state = play(recording, waves)
+    if (state.score, state.kills) != (recording.score, recording.kills):
+        raise ReplayError(
+            f"replay diverged: score {state.score} kills {state.kills}, "
+            f"recorded score {recording.score} kills {recording.kills}"
+        )
+    return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded sessions headlessly")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--waves", help="wave timeline file (default: data/waves.json)")
+    args = parser.parse_args(argv)
+
+    try:
+        waves = load_waves(args.waves) if args.waves else None
+    except (OSError, WaveError) as exc:
+        print(f"FAIL {exc}")
+        return 1
+
+    failed = 0
+    for path in args.files:
+        try:
+            rec = Recording.load(path)
+            t0 = time.perf_counter()
+            verify(rec, waves)
+            elapsed = time.perf_counter() - t0
+        except (OSError, ReplayError) as exc:
+            print(f"FAIL {exc}")
+            failed += 1
+            continue
+        frames = rec.frames
+        print(f"ok   {path}: {frames} frames, score {rec.score} kills {rec.kills}, "
+              f"{elapsed:.2f} s ({frames / rec.fps / max(elapsed, 1e-9):.0f}x real time)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import pygame
+
+# ---------------------------------------------------------
+# SCENE DIRECTOR
+# ---------------------------------------------------------
+# One loop owns the clock and the event queue. Every frame the
+# current scene gets the pending events, one update and one draw.
+# A faded switch darkens the old scene's live frames, swaps scenes
+# at full black and brightens the new one's; nothing ever blocks,
+# so input reaches the incoming scene on its first frame.
+
+
+class Scene:
+    """One screen of the game; override what the screen needs"""
+
+    fps = 60
+
+    def enter(self):
+        """Called each time the scene becomes current"""
+
+    def handle(self, event):
+        """One input event (not called while the scene is fading out)"""
+
+    def update(self, dt):
+        """Advance by `dt` milliseconds of real time"""
+
+    def draw(self, force):
+        """Draw and present a frame; `force` asks for a full repaint"""
+
+    def quit(self):
+        """The window was closed while this scene was current"""
+
+
+class Director:
+    def __init__(self, clock, fade_ms=800, fade_fps=60):
+        self.clock = clock
+        # Half the fade darkens the old scene, half brightens the new
+        self.half_fade = fade_ms / 2
+        self.fade_fps = fade_fps
+
+        self.scene = None
+        self.running = False
+        self._next = None
+        self._phase = None   # None, "out" or "in"
+        self._elapsed = 0.0
+        self._repaint = True
+
+    @property
+    def fading(self):
+        return self._phase is not None
+
+    @property
+    def fade_alpha(self):
+        """Strength of the black overlay for this frame, 0-255"""
+        if self._phase is None:
+            return 0
+        t = min(1.0, self._elapsed / self.half_fade)
+        return int(255 * (t if self._phase == "out" else 1 - t))
+
+    def switch(self, scene, fade=False):
+        if not fade:
+            self._next = None
+            self._phase = None
+            self._enter(scene)
+            return
+        # Start darkening from wherever a fade-in has got to
+        alpha = self.fade_alpha
+        self._next = scene
+        self._phase = "out"
+        self._elapsed = self.half_fade * alpha / 255
+
+    def stop(self):
+        self.running = False
+
+    def _enter(self, scene):
+        self.scene = scene
+        self._repaint = True
+        scene.enter()
+
+    def _advance(self, dt):
+        if self._phase is None:
+            return
+        self._elapsed += dt
+        if self._elapsed < self.half_fade:
+            return
+        if self._phase == "out":
+            self._phase = "in"
+            self._elapsed = 0.0
+            scene, self._next = self._next, None
+            self._enter(scene)
+        else:
+            # Fade finished: one clean frame without the overlay
+            self._phase = None
+            self._repaint = True
+
+    def run(self, scene):
+        self.running = True
+        self._enter(scene)
+
+        while self.running:
+            fps = max(self.scene.fps, self.fade_fps) if self.fading else self.scene.fps
+            dt = self.clock.tick(fps)
+
+            leaving = self._phase == "out"
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.scene.quit()
+                    self.running = False
+                elif not leaving:
+                    self.scene.handle(event)
+            if not self.running:
+                break
+
+            self.scene.update(dt)
+            self._advance(dt)
+
+            # The scene may have switched during update or the fade
+            force = self._repaint or self.fading
+            self._repaint = False
+            self.scene.draw(force)
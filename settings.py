@@ -1,3 +1,76 @@
+import os
+
 WIDTH = 800
 HEIGHT = 600
 FPS = 60
+
+# The game always draws at WIDTH x HEIGHT. FULLSCREEN opens at the
+# desktop's native resolution (or DISPLAY_SIZE) and DISPLAY_SIZE
+# alone opens a window of that size; either way each frame is scaled
+# up in one pass. SCALE_FILTER: "integer" (largest whole factor,
+# crisp, centred with black bars) or "smooth" (smoothscale to fill
+# as much as the aspect ratio allows).
+FULLSCREEN = False
+DISPLAY_SIZE = None
+SCALE_FILTER = "integer"
+
+# Scaled sprite sizes (shared by rendering and the headless simulation)
+SHIP_SIZE = (int(85 * 0.99), int(110 * 0.99))
+UFO_SIZE = (int(90 * 1.01), int(60 * 1.01))
+BULLET_SIZE = (7.5, 15)
+METEOR_SIZE = (90, 90)
+PLANET_SIZES = [
+    (int(150 * 0.99), int(150 * 0.99)),
+    (int(160 * 0.99), int(160 * 0.99)),
+    (int(130 * 1.18), int(130 * 1.18)),
+    (int(150 * 0.99), int(150 * 0.99)),
+]
+EXPLOSION_SIZE = (150, 150)
+SMALL_EXPL_SIZE = (80, 80)
+
+# Asset folder, resolved so headless tools work from any directory
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+# Rendering: "full" pushes the whole window every frame, "dirty"
+# pushes only the areas sprites and HUD labels touched. Dirty mode
+# pays off when the background is still (BG_SCROLL_SPEED = 0).
+RENDER_MODE = "full"
+BG_SCROLL_SPEED = 2
+
+# Multiplies BG_SCROLL_SPEED. Planets drift 2 px per frame, the
+# default scroll speed, so at 1 they sit still on the background;
+# below 1 the background falls behind and they read as nearer.
+BG_PARALLAX = 1.0
+
+# Menus only need to react to the mouse, so they run at a lower cap
+MENU_FPS = 30
+
+# High score rows shown per stats page
+STATS_PER_PAGE = 7
+
+# Every game is recorded (seed + per-frame keys) for replay.py
+RECORD_REPLAYS = True
+REPLAY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replays")
+
+# Per-session gameplay events and frame time samples go to the
+# stats database (see telemetry.py)
+TELEMETRY = True
+
+# Frame profiler: F3 in game toggles the overlay (and starts
+# recording). PROFILE records from the first frame; PROFILE_DUMP
+# writes the buffer to a .csv or .json file when the game exits.
+PROFILE = False
+PROFILE_DUMP = None
+
+# The simulation always steps at FPS. Rendering runs at up to
+# RENDER_FPS and draws positions blended between the last two steps.
+# After a stall at most MAX_CATCHUP_STEPS steps run per rendered
+# frame; the rest of the backlog is dropped.
+RENDER_FPS = 144
+MAX_CATCHUP_STEPS = 5
+
+# Optional polish (button glow, background scroll rate, ship blink,
+# explosion count) steps down when frames run over the 1/FPS budget
+# and back up when there is room again. Set a tier name from
+# quality.TIERS ("high", "medium", "low", "minimal") to pin it.
+QUALITY = None
@@ -0,0 +1,115 @@
+"""Batch-simulate seeded bot games for balance tuning.
+
+Plays many games headlessly with a bot policy (see bots.py), spread
+over a process pool, and stores one row per game in the sim_runs
+table. Spawn pacing comes from a wave file (see spawner.py), so a
+difficulty curve can be tried per batch, e.g.
+
+    python simulate.py --games 2000 --policy dodger
+    python simulate.py --games 2000 --waves my_waves.json
+
+Compare batches afterwards with plain SQL, e.g.
+
+    SELECT batch_id, AVG(score), AVG(frames) FROM sim_runs GROUP BY batch_id
+"""
+import argparse
+import collections
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import db
+from bots import POLICIES
+from game import GameState, step
+from settings import FPS
+from spawner import WAVES_FILE, WaveError, load_waves
+
+# Rows are written to SQLite in batches of this size
+INSERT_BATCH = 1000
+
+
+def play_one(seed, policy, waves, max_frames):
+    """One game; returns (seed, score, kills, frames, distance, cause)"""
+    state = GameState(seed, load_waves(waves))
+    bot = POLICIES[policy](seed)
+    frames = 0
+    while not state.game_over and frames < max_frames:
+        step(state, bot(state))
+        frames += 1
+    cause = state.deaths[-1] if state.game_over else "timeout"
+    return seed, state.score, state.kills, frames, state.distance_traveled, cause
+
+
+def _play_chunk(job):
+    seeds, policy, waves, max_frames = job
+    return [play_one(seed, policy, waves, max_frames) for seed in seeds]
+
+
+def _describe(waves):
+    return [{"start": w.start, "spawns": [s._asdict() for s in w.streams]} for w in load_waves(waves)]
+
+
+def run_batch(games, policy="hunter", waves=WAVES_FILE, first_seed=0, workers=None,
+              chunk=25, max_frames=FPS * 600):
+    """Play `games` games and store them; returns (batch_id, runs, seconds, workers)"""
+    waves = os.path.abspath(waves)
+    workers = workers or os.cpu_count() or 1
+    seeds = range(first_seed, first_seed + games)
+    jobs = [(seeds[k:k + chunk], policy, waves, max_frames) for k in range(0, games, chunk)]
+
+    # The wave definition itself is stored, so the batch stays
+    # comparable after the file changes
+    params = {"waves": waves, "timeline": _describe(waves), "max_frames": max_frames, "first_seed": first_seed}
+    batch_id = db.create_sim_batch(policy, games, params)
+    runs, pending = [], []
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        for rows in pool.map(_play_chunk, jobs):
+            runs += rows
+            pending += rows
+            if len(pending) >= INSERT_BATCH:
+                db.insert_sim_runs(batch_id, pending)
+                pending = []
+    if pending:
+        db.insert_sim_runs(batch_id, pending)
+    return batch_id, runs, time.perf_counter() - t0, workers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play seeded bot games in parallel and store the results")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="hunter")
+    parser.add_argument("--seed", type=int, default=0, help="first seed; games use seed, seed+1, ...")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--chunk", type=int, default=25, help="games per task sent to a worker")
+    parser.add_argument("--max-frames", type=int, default=FPS * 600,
+                        help="stop a game after this many frames (cause 'timeout')")
+    parser.add_argument("--waves", default=WAVES_FILE, help="wave file (.json or .toml) with the spawn timeline")
+    parser.add_argument("--db", default=db.DB_NAME, help=f"SQLite file (default {db.DB_NAME})")
+    args = parser.parse_args(argv)
+
+    try:
+        load_waves(os.path.abspath(args.waves))
+    except (OSError, ValueError, WaveError) as exc:
+        parser.error(f"cannot use wave file: {exc}")
+
+    db.DB_NAME = args.db
+    db.init_db()
+
+    batch_id, runs, elapsed, workers = run_batch(
+        args.games, args.policy, args.waves, args.seed, args.workers, args.chunk, args.max_frames,
+    )
+
+    n = len(runs)
+    frames = sum(r[3] for r in runs)
+    causes = collections.Counter(r[5] for r in runs)
+    print(f"batch {batch_id}: {n} games, policy {args.policy}, {workers} workers, {elapsed:.1f} s")
+    print(f"  {n / elapsed:.1f} games/s, {n / elapsed / workers:.1f} games/s/core, "
+          f"{frames / elapsed / workers:.0f} frames/s/core")
+    print(f"  mean score {sum(r[1] for r in runs) / n:.1f}, kills {sum(r[2] for r in runs) / n:.1f}, "
+          f"survival {frames / n / FPS:.1f} s ({sum(r[4] for r in runs) / n:.0f} distance)")
+    print("  cause of death: " + ", ".join(f"{c} {k / n:.0%}" for c, k in causes.most_common()))
+
+
+if __name__ == "__main__":
+    main()
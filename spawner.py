@@ -0,0 +1,191 @@
+"""Spawn timeline: what appears when, driven by a wave file.
+
+A wave file (JSON, or TOML when the name ends in .toml) lists waves
+by the frame they start on. Each wave replaces the previous one's
+spawn streams:
+
+    {"waves": [
+        {"start": 0, "spawns": [
+            {"kind": "ufo", "every": 136},
+            {"kind": "meteor", "every": 241},
+            {"kind": "planet", "clock": "distance", "gap": [150, 720]}
+        ]},
+        {"start": 3600, "spawns": [
+            {"kind": "ufo", "gap": [60, 110]},
+            {"kind": "meteor", "every": 180, "first": 30},
+            {"kind": "planet", "clock": "distance", "gap": [150, 600]}
+        ]}
+    ]}
+
+A stream spawns `kind` every `every` ticks, or after a random
+`gap` [min, max] each time, on the "frame" clock (simulation frames
+played, not counting pauses) or the "distance" clock (distance
+travelled). The first spawn of a stream comes one interval after
+its wave starts, or `first` ticks after when given.
+"""
+import functools
+import hashlib
+import heapq
+import json
+import os
+from collections import namedtuple
+
+KINDS = ("planet", "ufo", "meteor")
+CLOCKS = ("frame", "distance")
+
+WAVES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "waves.json")
+
+Stream = namedtuple("Stream", "kind clock every gap first")
+Wave = namedtuple("Wave", "start streams")
+
+
+class WaveError(Exception):
+    pass
+
+
+# ---------------------------------------------------------
+# WAVE FILES
+# ---------------------------------------------------------
+def _stream(spec, where):
+    if not isinstance(spec, dict):
+        raise WaveError(f"{where}: expected an object")
+    kind = spec.get("kind")
+    if kind not in KINDS:
+        raise WaveError(f"{where}: kind must be one of {', '.join(KINDS)}, not {kind!r}")
+    clock = spec.get("clock", "frame")
+    if clock not in CLOCKS:
+        raise WaveError(f"{where}: clock must be one of {', '.join(CLOCKS)}, not {clock!r}")
+
+    every, gap = spec.get("every"), spec.get("gap")
+    if (every is None) == (gap is None):
+        raise WaveError(f"{where}: give exactly one of 'every' and 'gap'")
+    if every is not None and (not isinstance(every, int) or every < 1):
+        raise WaveError(f"{where}: 'every' must be a positive integer")
+    if gap is not None:
+        if (not isinstance(gap, list) or len(gap) != 2 or not all(isinstance(g, int) for g in gap)
+                or not 1 <= gap[0] <= gap[1]):
+            raise WaveError(f"{where}: 'gap' must be [min, max] with 1 <= min <= max")
+        gap = tuple(gap)
+    first = spec.get("first")
+    if first is not None and (not isinstance(first, int) or first < 0):
+        raise WaveError(f"{where}: 'first' must be a non-negative integer")
+    return Stream(kind, clock, every, gap, first)
+
+
+def parse_waves(data, name="waves"):
+    """Validated Waves, sorted by start, from a decoded wave file"""
+    waves = data.get("waves") if isinstance(data, dict) else None
+    if not isinstance(waves, list) or not waves:
+        raise WaveError(f"{name}: expected a non-empty 'waves' list")
+    parsed = []
+    for k, wave in enumerate(waves):
+        where = f"{name}: wave {k}"
+        start = wave.get("start") if isinstance(wave, dict) else None
+        if not isinstance(start, int) or start < 0:
+            raise WaveError(f"{where}: 'start' must be a non-negative frame number")
+        spawns = wave.get("spawns", [])
+        streams = tuple(_stream(spec, f"{where} spawn {j}") for j, spec in enumerate(spawns))
+        parsed.append(Wave(start, streams))
+    parsed.sort(key=lambda w: w.start)
+    if parsed[0].start != 0:
+        raise WaveError(f"{name}: the first wave must start at frame 0")
+    return tuple(parsed)
+
+
+@functools.lru_cache(maxsize=None)
+def load_waves(path=WAVES_FILE):
+    """Parse a wave file once per path"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    if path.endswith(".toml"):
+        import tomllib
+        data = tomllib.loads(raw.decode())
+    else:
+        data = json.loads(raw)
+    return parse_waves(data, os.path.basename(path))
+
+
+def waves_digest(waves):
+    """64-bit hash of a parsed timeline, to tell which one a run was played on.
+
+    Taken from the parsed waves, so layout, key order and JSON vs TOML
+    do not change it.
+    """
+    text = json.dumps(waves, separators=(",", ":"))
+    return int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+
+
+# ---------------------------------------------------------
+# SCHEDULER
+# ---------------------------------------------------------
+# One heap per clock holds the next due tick of every live stream;
+# the frame heap also holds the wave starts. A step pops only what
+# is due. Streams of a wave that has ended, and entries a stream
+# has since replaced, are left in the heap and skipped when they
+# surface. Ties within a clock pop in wave-file order.
+
+_WAVE = -1
+
+
+class SpawnScheduler:
+    def __init__(self, waves, rng):
+        self.rng = rng
+        self.waves = waves
+        self.wave = None
+        self._heaps = {clock: [] for clock in CLOCKS}
+        # Per stream index of the current wave: the live heap entry
+        self._live = []
+        for k, wave in enumerate(waves[1:], 1):
+            heapq.heappush(self._heaps["frame"], (wave.start, _WAVE, k))
+        # Wave 0 starts before the first step (frame 1); what it makes
+        # due at once ("first": 0) comes out of that step's pop_due()
+        self._start_wave(0, {"frame": 0, "distance": 0})
+
+    def _interval(self, stream):
+        if stream.every is not None:
+            return stream.every
+        return self.rng.randint(*stream.gap)
+
+    def _push(self, index, due):
+        entry = (due, index, self.wave)
+        self._live[index] = entry
+        heapq.heappush(self._heaps[self.waves[self.wave].streams[index].clock], entry)
+
+    def _start_wave(self, k, clocks):
+        self.wave = k
+        streams = self.waves[k].streams
+        self._live = [None] * len(streams)
+        for index, stream in enumerate(streams):
+            now = clocks[stream.clock]
+            self._push(index, now + (stream.first if stream.first is not None else self._interval(stream)))
+
+    def pop_due(self, frame, distance):
+        """Kinds due by `frame` / `distance`; each stream is rescheduled.
+
+        Returns (kind, stream index) pairs in KINDS order, the order
+        step() has always spawned in.
+        """
+        clocks = {"frame": frame, "distance": distance}
+        due = []
+        # Frame heap first: it holds the wave starts
+        for clock in CLOCKS:
+            heap = self._heaps[clock]
+            while heap and heap[0][0] <= clocks[clock]:
+                entry = heapq.heappop(heap)
+                _, index, wave = entry
+                if index == _WAVE:
+                    self._start_wave(wave, clocks)
+                    continue
+                if wave != self.wave or self._live[index] is not entry:
+                    continue
+                stream = self.waves[wave].streams[index]
+                due.append((stream.kind, index))
+                self._push(index, clocks[clock] + self._interval(stream))
+        due.sort(key=lambda d: KINDS.index(d[0]))
+        return due
+
+    def postpone(self, index, frame, distance, ticks):
+        """Try stream `index` again `ticks` from now instead of its next interval"""
+        stream = self.waves[self.wave].streams[index]
+        now = frame if stream.clock == "frame" else distance
+        self._push(index, now + ticks)
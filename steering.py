@@ -0,0 +1,99 @@
+import numpy as np
+
+from settings import WIDTH, HEIGHT
+
+# ---------------------------------------------------------
+# PLANET AVOIDANCE FIELD
+# ---------------------------------------------------------
+# A coarse grid over where a UFO's top-left corner can be. A cell
+# holds how many planets a UFO box anchored anywhere in it could
+# touch, and which way is away from them: +1 per planet whose centre
+# is left of the UFO's, -1 per planet right of it. Planets are
+# stamped in when the grid is built, so testing a whole batch of
+# UFOs is one lookup each, whatever the number of planets.
+#
+# Planets all drift at the same speed, so between builds the grid is
+# read shifted by how far they have moved; it reaches DRIFT pixels
+# higher than a UFO can be to leave room for that. It is rebuilt
+# when a planet spawns or leaves, and when the planets have drifted
+# past its top rows. The test errs towards avoiding (by under a cell
+# each side), never misses a planet.
+
+CELL = 10
+DRIFT = 200
+# UFO top-left rows covered at build time: from above the spawn row
+# (and DRIFT more) to the bottom edge, where UFOs are removed
+TOP = -100 - DRIFT
+BOTTOM = HEIGHT + CELL
+COLS = -(-WIDTH // CELL)
+ROWS = -(-(BOTTOM - TOP) // CELL)
+
+
+def _reach(lo, size, box, count):
+    """Anchor cells from which a `box`-long span can touch [lo, lo + size)"""
+    first = max((lo - box - CELL + 1) // CELL + 1, 0)
+    last = min(-(-(lo + size) // CELL), count)
+    return first, last
+
+
+class PlanetField:
+    def __init__(self, widths, heights, box):
+        self.widths = widths    # per planet sprite index
+        self.heights = heights
+        self.box_w, self.box_h = int(box[0]), int(box[1])
+        self.count = np.zeros(ROWS * COLS, dtype=np.int16)
+        self.away = np.zeros(ROWS * COLS, dtype=np.int16)
+        self._n = 0
+        self._anchor = 0.0
+        self.offset = 0.0
+        self.stale = True
+        self.builds = 0
+
+    def invalidate(self):
+        """Rebuild on the next update, e.g. after a planet spawned"""
+        self.stale = True
+
+    def update(self, planets):
+        """Follow the planets' drift; rebuild when the set changed or it ran out of rows"""
+        n = planets.n
+        moved = planets.y[0] - self._anchor if n else 0.0
+        if self.stale or n != self._n or moved >= DRIFT:
+            self._build(planets)
+            moved = 0.0
+        self.offset = moved
+
+    def _build(self, planets):
+        n = planets.n
+        count = self.count.reshape(ROWS, COLS)
+        away = self.away.reshape(ROWS, COLS)
+        count[:] = 0
+        away[:] = 0
+        bw, bh = self.box_w, self.box_h
+
+        for x, y, idx in zip(planets.x[:n].tolist(), planets.y[:n].tolist(),
+                             planets.aux[:n].tolist()):
+            w, h = int(self.widths[int(idx)]), int(self.heights[int(idx)])
+            x, y = int(x), int(y) - TOP
+            r0, r1 = _reach(y, h, bh, ROWS)
+            c0, c1 = _reach(x, w, bw, COLS)
+            if r0 >= r1 or c0 >= c1:
+                continue
+            count[r0:r1, c0:c1] += 1
+            # Anchor columns whose UFO centre lies left / right of the planet's
+            split = (x + w / 2 - bw / 2) / CELL - 0.5
+            left_end = min(max(-int(-split // 1), c0), c1)
+            right_start = min(max(int(split // 1) + 1, c0), c1)
+            away[r0:r1, c0:left_end] -= 1
+            away[r0:r1, right_start:c1] += 1
+
+        self._anchor = planets.y[0] if n else 0.0
+        self._n = n
+        self.stale = False
+        self.builds += 1
+
+    def query(self, xs, ys):
+        """Per UFO box: (may touch a planet, away; > 0 means away is right)"""
+        col = np.clip(xs // CELL, 0, COLS - 1).astype(np.intp)
+        row = np.clip((np.trunc(ys) - self.offset - TOP) // CELL, 0, ROWS - 1).astype(np.intp)
+        cell = row * COLS + col
+        return self.count.take(cell) > 0, self.away.take(cell)
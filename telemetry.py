@@ -0,0 +1,146 @@
+"""Gameplay telemetry: what happens in each played session.
+
+step() reports spawns, UFO kills, meteor hits and lives lost (with
+their cause and position) into a list on the GameState; the game
+scene adds one frame time sample per second of play, tagged with
+the render quality tier in effect. Everything is
+kept in memory and handed to the stats writer thread every few
+seconds, which inserts each batch with executemany in a single
+transaction, so the game thread never waits on SQLite.
+
+    python telemetry.py                 # latest sessions + aggregates
+    python telemetry.py --csv out.csv   # export the raw events
+"""
+import argparse
+import csv
+import sys
+import time
+
+import db
+from game import FRAME_MS
+
+# Game time (ms) between frame samples and between hand-offs to the writer
+SAMPLE_MS = 1000
+FLUSH_MS = 5000
+
+
+class Telemetry:
+    """Buffers one session's events and frame samples"""
+
+    def __init__(self, session_id, sample_ms=SAMPLE_MS, flush_ms=FLUSH_MS):
+        self.session_id = session_id
+        self.sample_ms = sample_ms
+        self.flush_ms = flush_ms
+
+        # Filled by step() once attach()ed: (now, kind, detail, x, y)
+        self.events = []
+        self.samples = []
+
+        self._frames = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._next_sample = sample_ms
+        self._next_flush = flush_ms
+
+    def attach(self, state):
+        state.events = self.events
+
+    def frame(self, state, frame_ms, quality=None):
+        """Count one rendered frame's work time; samples and flushes on schedule"""
+        self._frames += 1
+        self._sum += frame_ms
+        if frame_ms > self._max:
+            self._max = frame_ms
+
+        now = state.now
+        if now >= self._next_sample:
+            entities = (state.bullets.n + state.enemies.n + state.planets.n
+                        + state.meteors.n + state.small_explosions.n)
+            self.samples.append((self.session_id, now, self._frames,
+                                 self._sum / self._frames, self._max, entities, quality))
+            self._frames = 0
+            self._sum = self._max = 0.0
+            self._next_sample = now + self.sample_ms
+        if now >= self._next_flush:
+            self.flush()
+            self._next_flush = now + self.flush_ms
+
+    def flush(self):
+        """Hand everything buffered to the writer thread"""
+        sid = self.session_id
+        if self.events:
+            db.submit_events([(sid, *event) for event in self.events])
+            # Cleared in place: the GameState holds this list
+            self.events.clear()
+        if self.samples:
+            db.submit_frame_samples(self.samples)
+            self.samples = []
+
+    def close(self, state):
+        self.flush()
+        db.end_session(self.session_id, state.score, state.kills, round(state.now / FRAME_MS))
+
+
+# ---------------------------------------------------------
+# REPORT + EXPORT
+# ---------------------------------------------------------
+def export_csv(path, session_id=None):
+    """Write the raw events to a CSV file; returns the row count"""
+    count = 0
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["session_id", "t_ms", "kind", "detail", "x", "y"])
+        for row in db.iter_events(session_id):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise or export gameplay telemetry")
+    parser.add_argument("--db", default=db.DB_NAME, help=f"SQLite file (default {db.DB_NAME})")
+    parser.add_argument("--session", type=int, default=None, help="only this session")
+    parser.add_argument("--csv", default=None, help="export the raw events to this file")
+    parser.add_argument("--sessions", type=int, default=10, help="latest sessions to list")
+    args = parser.parse_args(argv)
+
+    db.DB_NAME = args.db
+    db.init_db()
+
+    if args.csv:
+        n = export_csv(args.csv, args.session)
+        print(f"{n} events written to {args.csv}")
+        return 0
+
+    print(f"{'SESSION':>7} {'STARTED':<16} {'SCORE':>6} {'KILLS':>5} {'TIME':>6} "
+          f"{'DEATHS':>6} {'AVG MS':>7} {'MAX MS':>7}")
+    for sid, started, seed, score, kills, frames, deaths, mean, peak in db.session_summaries(args.sessions):
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(started))
+        secs = f"{frames * FRAME_MS / 1000:.0f}s" if frames is not None else "-"
+        print(f"{sid:>7} {when:<16} {score if score is not None else '-':>6} "
+              f"{kills if kills is not None else '-':>5} {secs:>6} {deaths:>6} "
+              f"{mean or 0:7.2f} {peak or 0:7.2f}")
+
+    causes = db.death_causes(args.session)
+    total = sum(causes.values())
+    if total:
+        print("\nlives lost: " + ", ".join(
+            f"{cause} {n} ({n / total:.0%})" for cause, n in sorted(causes.items(), key=lambda c: -c[1])
+        ))
+
+    load = db.frame_time_by_load(session_id=args.session)
+    if load:
+        print(f"\n{'ENTITIES':>8} {'SECONDS':>7} {'AVG MS':>7} {'MAX MS':>7}")
+        for entities, seconds, mean, peak in load:
+            print(f"{entities:>8} {seconds:>7} {mean:7.2f} {peak:7.2f}")
+
+    tiers = db.frame_time_by_quality(session_id=args.session)
+    if tiers:
+        print(f"\n{'QUALITY':>8} {'SECONDS':>7} {'AVG MS':>7} {'MAX MS':>7}")
+        for quality, seconds, mean, peak in tiers:
+            print(f"{quality or '-':>8} {seconds:>7} {mean:7.2f} {peak:7.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
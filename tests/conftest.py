@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+
+
+@pytest.fixture
+def stats_db(tmp_path, monkeypatch):
+    """db.py pointed at a fresh file, with its own connection and writer"""
+    db.close_db()
+    monkeypatch.setattr(db, "DB_NAME", str(tmp_path / "stats.db"))
+    monkeypatch.setattr(db, "_leaderboard", None)
+    db.init_db()
+    yield db.DB_NAME
+    db.close_db()
@@ -0,0 +1,7 @@
+import bench
+
+
+def test_steady_state_frames_allocate_next_to_nothing():
+    # Exits 1 (and prints which scenario) when a scenario keeps memory,
+    # or an idle/typical frame peaks above 16 KB or triggers a GC run
+    assert bench.bench_alloc(frames=300) == 0
@@ -0,0 +1,20 @@
+import numpy as np
+
+import bots
+from game import GameState
+from settings import SHIP_SIZE
+
+
+def test_dodger_uses_the_rock_height(monkeypatch):
+    # A tall, narrow planet whose bottom is past the ship but whose top
+    # is not: it still overlaps the ship, so the bot has to move
+    monkeypatch.setattr(bots, "PLANET_W", np.array([20]))
+    monkeypatch.setattr(bots, "PLANET_H", np.array([300]))
+    state = GameState(0)
+    for pool in (state.enemies, state.meteors, state.planets):
+        pool.clear()
+    ship_bottom = state.py + SHIP_SIZE[1]
+    state.planets.spawn(state.px + 10, ship_bottom + 50 - 300, vy=2, aux=0)
+
+    inputs = bots.dodger(0)(state)
+    assert inputs.left or inputs.right
@@ -0,0 +1,140 @@
+import sqlite3
+import time
+
+import db
+
+
+def test_first_run_is_not_counted_twice(stats_db, monkeypatch):
+    # The writer can commit before update_stats() returns; make it
+    # always win that race
+    writer = db.get_writer()
+    submit = writer.submit
+
+    def submit_and_wait(sql, params):
+        submit(sql, params)
+        writer.flush()
+
+    monkeypatch.setattr(writer, "submit", submit_and_wait)
+    db.update_stats(0, 0)
+
+    board = db.get_leaderboard()
+    assert board.top == [(0, 0)]
+    assert board.total == 1
+    assert board.page_count() == 1
+    assert db.get_connection().execute("SELECT COUNT(*) FROM stats").fetchone()[0] == 1
+
+
+def test_update_stats_does_not_wait_for_a_locked_database(stats_db):
+    blocker = sqlite3.connect(stats_db, isolation_level=None)
+    blocker.execute("BEGIN EXCLUSIVE")
+    try:
+        start = time.perf_counter()
+        for k in range(5):
+            db.update_stats(100 + k, k)
+        assert time.perf_counter() - start < 0.05
+        # Let the writer run into the lock
+        time.sleep(0.3)
+    finally:
+        blocker.execute("ROLLBACK")
+        blocker.close()
+
+    assert db.get_writer().flush(timeout=10)
+    rows = db.get_connection().execute("SELECT score, kills FROM stats ORDER BY id").fetchall()
+    assert rows == [(100 + k, k) for k in range(5)]
+
+
+def test_writer_drops_a_failing_batch_and_keeps_going(stats_db):
+    writer = db.get_writer()
+    insert = "INSERT INTO stats (id, score, kills) VALUES (?, ?, ?)"
+    writer.submit(insert, (1, 10, 1))
+    assert writer.flush(timeout=5)
+    # Same primary key: IntegrityError, which no retry can fix
+    writer.submit(insert, (1, 20, 2))
+    assert writer.flush(timeout=5)
+
+    db.update_stats(30, 3)
+    assert writer.flush(timeout=5)
+    rows = db.get_connection().execute("SELECT score, kills FROM stats ORDER BY id").fetchall()
+    assert rows == [(10, 1), (30, 3)]
+
+    start = time.perf_counter()
+    writer.close()
+    assert not writer.is_alive()
+    assert time.perf_counter() - start < 1
+
+
+def test_writer_does_not_retry_a_permanent_failure(stats_db, monkeypatch, caplog):
+    writer = db.get_writer()
+    # OperationalError, but not one that goes away by waiting
+    writer.submit("INSERT INTO no_such_table VALUES (?)", (1,))
+    start = time.perf_counter()
+    assert writer.flush(timeout=5)
+    assert time.perf_counter() - start < 1
+    assert "no such table" in caplog.text
+
+    db.update_stats(10, 1)
+    assert writer.flush(timeout=5)
+    assert db.get_connection().execute("SELECT score, kills FROM stats").fetchall() == [(10, 1)]
+
+    # A read-only database fails every write the same way
+    connect = db._connect
+
+    def read_only(timeout):
+        conn = connect(timeout)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    monkeypatch.setattr(db, "_connect", read_only)
+    writer = db.StatsWriter()
+    writer.start()
+    try:
+        for k in range(3):
+            writer.submit("INSERT INTO stats (score, kills) VALUES (?, ?)", (k, k))
+            assert writer.flush(timeout=1)
+        assert writer.is_alive()
+        assert writer.queue.empty()
+        assert "readonly" in caplog.text
+    finally:
+        writer.close()
+
+
+def test_leaderboard_stays_off_the_game_thread(stats_db, monkeypatch):
+    writer = db.get_writer()
+    for k in range(3):
+        writer.submit("INSERT INTO stats (score, kills) VALUES (?, ?)", (10 * k, k))
+    board = db.Leaderboard(size=2)
+    monkeypatch.setattr(db, "_leaderboard", board)
+    board.start()
+
+    # Any read on this thread would fail
+    conn, connect = db.get_connection(), db._connect
+    db._conn = db._connect = None
+    try:
+        db.update_stats(15, 5)
+        db.update_stats(5, 6)
+    finally:
+        db._conn, db._connect = conn, connect
+
+    # Past the cache and through queries, without flushing the writer first
+    assert board.page_count(2) == 3
+    assert board.page(0, 2) == [(20, 2), (15, 5)]
+    assert board.page(1, 2) == [(10, 1), (5, 6)]
+    assert board.rank(12) == 3
+    assert board.percentile(5) == 40.0
+
+
+def test_frame_samples_record_the_quality_tier(stats_db):
+    from game import GameState
+    from telemetry import Telemetry
+
+    state = GameState(0)
+    telemetry = Telemetry(db.start_session(0), sample_ms=100)
+    for k, quality in enumerate(["high"] * 10 + ["low"] * 20):
+        state.now = 10 * (k + 1)
+        telemetry.frame(state, 8.0 if quality == "high" else 20.0, quality)
+    telemetry.flush()
+    assert db.get_writer().flush(timeout=5)
+
+    rows = db.frame_time_by_quality()
+    assert [(quality, seconds) for quality, seconds, _, _ in rows] == [("low", 2), ("high", 1)]
+    assert rows[0][3] == 20.0
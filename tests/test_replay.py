@@ -0,0 +1,24 @@
+import pytest
+
+from game import Inputs, step, GameState
+from replay import Recorder, Recording, ReplayError, play, verify
+from spawner import load_waves
+
+
+def test_replay_refuses_a_different_wave_timeline(tmp_path):
+    waves = load_waves()
+    edited = (waves[0]._replace(streams=waves[0].streams[:1]),) + waves[1:]
+
+    state = GameState(7, edited)
+    recorder = Recorder(7, edited)
+    for k in range(300):
+        inputs = Inputs(k % 40 < 20, k % 40 >= 20, True)
+        recorder.record(inputs)
+        step(state, inputs)
+    path = str(tmp_path / "run.rpl")
+    recorder.finish(state, path)
+
+    recording = Recording.load(path)
+    verify(recording, edited)
+    with pytest.raises(ReplayError, match="wave timeline"):
+        play(recording)
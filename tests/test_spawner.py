@@ -0,0 +1,27 @@
+import random
+
+from spawner import SpawnScheduler, parse_waves
+
+
+def spawn_frames(waves, frames):
+    scheduler = SpawnScheduler(parse_waves(waves), random.Random(0))
+    due = {}
+    for frame in range(1, frames + 1):
+        for kind, _ in scheduler.pop_due(frame, 2 * frame):
+            due.setdefault(kind, []).append(frame)
+    return due
+
+
+def test_first_zero_spawns_on_the_first_step():
+    due = spawn_frames({"waves": [
+        {"start": 0, "spawns": [{"kind": "ufo", "every": 100, "first": 0}]},
+    ]}, 250)
+    assert due == {"ufo": [1, 101, 201]}
+
+
+def test_first_zero_in_a_later_wave_spawns_when_it_starts():
+    due = spawn_frames({"waves": [
+        {"start": 0, "spawns": [{"kind": "ufo", "every": 100}]},
+        {"start": 150, "spawns": [{"kind": "meteor", "every": 50, "first": 0}]},
+    ]}, 250)
+    assert due == {"ufo": [100], "meteor": [150, 200, 250]}
@@ -0,0 +1,98 @@
+from collections import OrderedDict
+
+import pygame
+
+# ---------------------------------------------------------
+# TEXT SURFACE CACHE
+# ---------------------------------------------------------
+# FreeType renders are the most expensive thing the HUD and menus
+# do. Surfaces are cached by (font, text, color, antialias) with
+# LRU eviction. Glow and shadow effects are pre-baked into a single
+# composite surface, so unchanged text costs one blit. Text that
+# changes all the time (the HUD score) lives in named slots instead,
+# so it cannot flush the menu text out of the LRU.
+
+# Neon outline used by hovered buttons
+GLOW_OFFSETS = [
+    (-2, 0), (2, 0),
+    (0, -2), (0, 2),
+    (-2, -2), (2, -2),
+    (-2, 2), (2, 2)
+]
+
+
+class TextCache:
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._surfaces = OrderedDict()
+        self._slots = {}  # slot -> (key, surface)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def _get(self, key, build):
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+
+        self.misses += 1
+        surf = build()
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.max_size:
+            self._surfaces.popitem(last=False)
+        return surf
+
+    def render(self, font, text, color, antialias=True):
+        """Same as font.render(text, antialias, color), cached"""
+        key = (font, text, tuple(color), antialias)
+        return self._get(key, lambda: font.render(text, antialias, color))
+
+    def slot(self, name, font, text, color, antialias=True):
+        """Like render(), but keeps only the latest surface for `name`"""
+        key = (font, text, tuple(color), antialias)
+        cached = self._slots.get(name)
+        if cached is not None and cached[0] == key:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self._slots[name] = (key, surf)
+        return surf
+
+    def composite(self, font, text, color, under_color, offsets, antialias=True):
+        """Text drawn over copies of itself in `under_color` at `offsets`.
+
+        Returns (surface, (dx, dy)): blit the surface at (x + dx, y + dy)
+        to get the text at (x, y) with its effect around it.
+        """
+        key = (font, text, tuple(color), antialias, tuple(under_color), tuple(offsets))
+
+        def build():
+            base = self.render(font, text, color, antialias)
+            under = font.render(text, antialias, under_color)
+            left = -min(0, min(ox for ox, oy in offsets))
+            top = -min(0, min(oy for ox, oy in offsets))
+            right = max(0, max(ox for ox, oy in offsets))
+            bottom = max(0, max(oy for ox, oy in offsets))
+
+            w, h = base.get_size()
+            surf = pygame.Surface((w + left + right, h + top + bottom), pygame.SRCALPHA)
+            # Transparent, but in the effect color so blended edges keep it
+            surf.fill((*under_color[:3], 0))
+            for ox, oy in offsets:
+                surf.blit(under, (left + ox, top + oy))
+            surf.blit(base, (left, top))
+            return surf, (-left, -top)
+
+        return self._get(key, build)
+
+    def glow(self, font, text, color, glow_color, antialias=True):
+        return self.composite(font, text, color, glow_color, GLOW_OFFSETS, antialias)
+
+    def shadow(self, font, text, color, shadow_color, offset, antialias=True):
+        return self.composite(font, text, color, shadow_color, [offset], antialias)